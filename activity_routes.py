@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func, cast, Integer
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from typing import Optional
+import os
+
+from models import User, ActivityDailyCount
+from schemas import ActivityDailyCountResponse
+from auth import get_current_user
+from audit import activity_day, activity_class
+from read_replica import get_read_db
+from query_tracker import query_budget
+from fast_json import FastJSONResponse, rows_to_dicts
+
+router = APIRouter(prefix="/admin/activity", tags=["admin"])
+
+ACTIVITY_DEFAULT_DAYS = int(os.getenv("ACTIVITY_DEFAULT_DAYS", "7"))
+ACTIVITY_MAX_DAYS = int(os.getenv("ACTIVITY_MAX_DAYS", "366"))
+
+
+@router.get("", response_model=list[ActivityDailyCountResponse])
+@query_budget(2)
+def get_activity(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    action: Optional[str] = None,
+    class_name: Optional[str] = None,
+    by_class: bool = True,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Admin-only endpoint for daily audit event counts (logins, logouts, admin actions...).
+
+    - Only Admin (role=2) can access this endpoint
+    - Days are inclusive; defaults to the last 7 days including today
+    - Optional filters: action (e.g. "login"), class_name ("" for users without a class)
+    - by_class=false sums the classes into one row per day and action
+    - Read from the activity_daily_counts rollup, so the cost depends on the
+      number of days, not on the audit log size
+    """
+    # Check if current user is admin
+    if current_user.role != 2:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can view activity"
+        )
+
+    date_to = date_to or activity_day(datetime.utcnow())
+    date_from = date_from or date_to - timedelta(days=ACTIVITY_DEFAULT_DAYS - 1)
+    if date_from > date_to or (date_to - date_from).days >= ACTIVITY_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"date_from must be before date_to and the range at most {ACTIVITY_MAX_DAYS} days"
+        )
+
+    keys = [ActivityDailyCount.day, ActivityDailyCount.action]
+    if by_class:
+        keys.append(ActivityDailyCount.class_name)
+    # CAST: MySQL returns SUM() as DECIMAL
+    total = cast(func.sum(ActivityDailyCount.count), Integer).label("count")
+    query = db.query(*keys, total).filter(
+        ActivityDailyCount.day >= date_from,
+        ActivityDailyCount.day <= date_to
+    )
+    if action:
+        query = query.filter(ActivityDailyCount.action == action)
+    if class_name is not None:
+        query = query.filter(ActivityDailyCount.class_name == activity_class(class_name))
+    rows = query.group_by(*keys).order_by(ActivityDailyCount.day.desc(), *keys[1:]).all()
+
+    extra = {} if by_class else {"class_name": None}
+    return FastJSONResponse(rows_to_dicts(rows, **extra))
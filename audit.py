@@ -0,0 +1,65 @@
+import os
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import AuditLog, ActivityDailyCount
+
+# Shift applied to UTC timestamps before taking the activity day (e.g. 9 for JST days)
+ACTIVITY_UTC_OFFSET_HOURS = float(os.getenv("ACTIVITY_UTC_OFFSET_HOURS", "0"))
+
+
+def activity_action(action: str) -> str:
+    """The rollup key of an audit action: "update_user:a@b.jp" -> "update_user"."""
+    return action.split(":", 1)[0][:64]
+
+
+def activity_class(class_name: str = None) -> str:
+    """The rollup key of a class: "" for users without one, cut to the column's 64 characters."""
+    return (class_name or "")[:64]
+
+
+def activity_day(timestamp: datetime) -> date:
+    return (timestamp + timedelta(hours=ACTIVITY_UTC_OFFSET_HOURS)).date()
+
+
+def increment_activity(db: Session, day: date, action: str, class_name: str = None, amount: int = 1):
+    """Add `amount` to the day/action/class counter in activity_daily_counts. The caller commits."""
+    values = {"day": day, "action": action, "class_name": activity_class(class_name), "count": amount}
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        statement = sqlite_insert(ActivityDailyCount).values(values).on_conflict_do_update(
+            index_elements=["day", "action", "class_name"],
+            set_={"count": ActivityDailyCount.count + amount}
+        )
+    elif dialect == "mysql":
+        statement = mysql_insert(ActivityDailyCount).values(values).on_duplicate_key_update(
+            count=ActivityDailyCount.count + amount
+        )
+    else:
+        updated = db.execute(update(ActivityDailyCount).where(
+            ActivityDailyCount.day == values["day"],
+            ActivityDailyCount.action == values["action"],
+            ActivityDailyCount.class_name == values["class_name"]
+        ).values(count=ActivityDailyCount.count + amount))
+        if updated.rowcount:
+            return
+        statement = ActivityDailyCount.__table__.insert().values(values)
+    db.execute(statement)
+
+
+def create_audit_log(db: Session, user_id: str, action: str, ip_address: str = None, class_name: str = None):
+    """Helper function to create audit log entries (and count them in activity_daily_counts)."""
+    now = datetime.utcnow()
+    audit_log = AuditLog(
+        user_id=user_id,
+        action=action,
+        ip_address=ip_address,
+        timestamp=now
+    )
+    db.add(audit_log)
+    increment_activity(db, activity_day(now), activity_action(action), class_name)
+    db.commit()
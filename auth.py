@@ -1,5 +1,9 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import threading
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -11,6 +15,9 @@ from dotenv import load_dotenv
 from database import get_db
 from models import User
 from schemas import TokenData
+from metrics import REGISTRY
+from token_versions import token_versions
+from warmup import warmup_step
 
 load_dotenv()
 
@@ -18,6 +25,22 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-please-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Trust role/class_name from the token instead of loading the user per request
+# (see get_current_user and token_versions.py)
+AUTH_STATELESS = os.getenv("AUTH_STATELESS", "false").lower() in ("1", "true", "yes")
+# Decoded tokens kept in memory by verify_token (0 disables the cache)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+AUTH_USER_LOOKUPS = REGISTRY.counter(
+    "hughigh_auth_user_lookups_total",
+    "How get_current_user resolved the user: from token claims or from the DB.",
+    ("source",),
+)
+TOKEN_CACHE_LOOKUPS = REGISTRY.counter(
+    "hughigh_token_cache_lookups_total",
+    "verify_token cache lookups by result (hit rate = hit / (hit + miss)).",
+    ("result",),
+)
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -36,6 +59,17 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def access_token_claims(user: User) -> dict:
+    """Claims of a user's access token; `ver` lets stateless mode reject superseded tokens."""
+    return {
+        "sub": user.id,
+        "email": user.email,
+        "role": user.role,
+        "class_name": user.class_name,
+        "ver": user.token_version or 0,
+    }
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -49,8 +83,56 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+class TokenCache:
+    """
+    LRU of decoded tokens, keyed by the token's SHA-256 digest.
+
+    A browser tab presents the same token on every request, so repeated
+    requests skip the signature check and JSON parsing. Entries are only
+    served until the token's `exp`; at most `max_size` are kept (0 disables).
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[TokenData, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: bytes) -> Optional[TokenData]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry[1] > time.time():
+                    self._entries.move_to_end(digest)
+                    TOKEN_CACHE_LOOKUPS.inc("hit")
+                    return entry[0]
+                del self._entries[digest]
+        TOKEN_CACHE_LOOKUPS.inc("miss")
+        return None
+
+    def put(self, digest: bytes, token_data: TokenData, expires_at: float):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (token_data, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+
 def verify_token(token: str) -> TokenData:
-    """Verify and decode a JWT token."""
+    """Verify and decode a JWT token (memoized until it expires, see TokenCache)."""
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(digest)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
@@ -64,7 +146,13 @@ def verify_token(token: str) -> TokenData:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        return TokenData(user_id=user_id, email=email, role=role)
+        token_data = TokenData(
+            user_id=user_id, email=email, role=role,
+            class_name=payload.get("class_name"), version=payload.get("ver")
+        )
+        if payload.get("exp") is not None:
+            _token_cache.put(digest, token_data, float(payload["exp"]))
+        return token_data
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,14 +161,7 @@ def verify_token(token: str) -> TokenData:
         )
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from the token."""
-    token = credentials.credentials
-    token_data = verify_token(token)
-
+def _load_user(db: Session, token_data: TokenData) -> User:
     user = db.query(User).filter(User.id == token_data.user_id).first()
     if user is None:
         raise HTTPException(
@@ -98,6 +179,87 @@ def get_current_user(
     return user
 
 
+def get_current_db_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get the current authenticated user, always loaded from the DB (for profile endpoints)."""
+    token_data = verify_token(credentials.credentials)
+    AUTH_USER_LOOKUPS.inc("db")
+    return _load_user(db, token_data)
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Get the current authenticated user from the token.
+
+    With AUTH_STATELESS the result is a detached User built from the token
+    claims (id, email, role, class_name only) after checking the token
+    version against token_versions; endpoints that need other fields use
+    get_current_db_user. Otherwise the user is loaded from the DB.
+    """
+    token_data = verify_token(credentials.credentials)
+
+    if AUTH_STATELESS and token_data.version is not None:
+        entry = token_versions.get(token_data.user_id)
+        if entry is not None:
+            token_version, is_active = entry
+            if not is_active:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Inactive user"
+                )
+            if token_data.version != token_version:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token has been revoked",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            AUTH_USER_LOOKUPS.inc("token")
+            return User(
+                id=token_data.user_id,
+                email=token_data.email,
+                role=token_data.role,
+                class_name=token_data.class_name,
+                is_active=True
+            )
+
+    # Stateful mode, tokens issued before `ver` existed, or users not in the table yet
+    AUTH_USER_LOOKUPS.inc("db")
+    user = _load_user(db, token_data)
+    if AUTH_STATELESS:
+        token_versions.set(user.id, user.token_version, user.is_active)
+        if token_data.version is not None and token_data.version != user.token_version:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    return user
+
+
+def bump_token_version(user: User):
+    """Invalidate the user's access tokens (role/class/active changes). The caller commits."""
+    user.token_version = (user.token_version or 0) + 1
+
+
+def publish_token_version(user: User):
+    """After the commit: apply the new version in this process at once."""
+    token_versions.set(user.id, user.token_version, user.is_active and user.deleted_at is None)
+
+
+@warmup_step("token_versions")
+def _warm_token_versions():
+    """Load the token version table up front in stateless mode."""
+    if not AUTH_STATELESS:
+        return None
+    token_versions.refresh()
+    return {"users": len(token_versions)}
+
+
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Ensure the current user is active."""
     if not current_user.is_active:
@@ -0,0 +1,163 @@
+"""
+Latency benchmark for the AI-backed endpoints.
+
+Starts the local OpenAI mock (openai_mock.py), points the app at it and
+drives /evaluate-humility and /generate-skill-advice in-process at a fixed
+concurrency. No network access or API key is needed.
+
+Both endpoints answer 200 with fallback content when the OpenAI call
+fails, so with --error-rate the HTTP error count stays at 0. Each phase
+therefore also reports the OpenAI calls it made and how many of them
+failed (the `openai` dependency metrics before and after the phase), and
+the resulting fallback rate. The OpenAI client retries 5xx responses, so
+this is lower than the mock's error rate.
+
+Usage:
+    python bench_ai_endpoints.py --requests 200 --concurrency 16 --latency lognormal:-1.6,0.5
+    python bench_ai_endpoints.py --json bench_output.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import io
+import tempfile
+import uuid
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from bench_utils import run_load, print_table
+from metrics import DEPENDENCY_CALLS, DEPENDENCY_ERRORS
+from openai_mock import MockConfig, start_in_thread
+
+
+SAMPLE_HUMILITY = {
+    "gratitude_targets": [
+        {"student_name": "鈴木花子", "message": "文化祭の準備で重い荷物を一緒に運んでくれてありがとう！"},
+        {"student_name": "佐藤次郎", "message": "数学の宿題でわからないところを丁寧に教えてくれて助かりました。"},
+    ],
+    "weakness": "計画を立てても途中で別のことに気を取られてしまうところ。",
+}
+
+SAMPLE_SKILLS = {
+    "skills": {
+        "戦略的計画力": 63,
+        "課題設定・構想力": 75,
+        "巻き込む力": 75,
+        "対話する力": 83,
+        "実行する力": 63,
+        "完遂する力": 100,
+        "謙虚である力": 72,
+    }
+}
+
+
+def run_phase(call, total: int, concurrency: int) -> dict:
+    """run_load plus the OpenAI calls made during the phase and how many fell back."""
+    calls_before = DEPENDENCY_CALLS.value("openai")
+    errors_before = DEPENDENCY_ERRORS.value("openai")
+    summary = run_load(call, total, concurrency)
+    calls = int(DEPENDENCY_CALLS.value("openai") - calls_before)
+    failed = int(DEPENDENCY_ERRORS.value("openai") - errors_before)
+    summary["openai_calls"] = calls
+    summary["openai_errors"] = failed
+    summary["fallback_rate"] = round(failed / calls, 4) if calls else 0.0
+    return summary
+
+
+def print_fallbacks(results: dict):
+    header = f"{'scenario':<28}{'ai calls':>10}{'ai errs':>9}{'fallback':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, s in results.items():
+        print(f"{name:<28}{s['openai_calls']:>10}{s['openai_errors']:>9}{s['fallback_rate']:>10.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI-backed endpoints against the local OpenAI mock")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", default="lognormal:-1.6,0.5", help="Mock latency spec (see openai_mock.py)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-port", type=int, default=8001)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    start_in_thread(
+        MockConfig(latency=args.latency, error_rate=args.error_rate, seed=args.seed),
+        port=args.mock_port,
+    )
+
+    # Must be configured before main/database are imported
+    os.environ["OPENAI_API_KEY"] = "mock"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.mock_port}/v1"
+    if not os.getenv("DATABASE_URL"):
+        db_path = os.path.join(tempfile.mkdtemp(prefix="hughigh-bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from migrate import upgrade
+    upgrade(verbose=False)
+
+    from fastapi.testclient import TestClient
+    from main import app
+    from database import SessionLocal
+    from models import User
+    from auth import create_access_token
+
+    db = SessionLocal()
+    try:
+        student = User(
+            id=str(uuid.uuid4()),
+            email=f"bench-{uuid.uuid4().hex[:8]}@example.com",
+            name="ベンチ生徒",
+            class_name="1-A",
+            role=0,
+            is_active=True
+        )
+        db.add(student)
+        db.commit()
+        token = create_access_token(data={"sub": student.id, "email": student.email, "role": student.role})
+    finally:
+        db.close()
+
+    # Entering the client runs the lifespan, which builds the OpenAI client up front
+    with TestClient(app) as client:
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def humility(_):
+            return client.post("/evaluate-humility", json=SAMPLE_HUMILITY, headers=headers).status_code == 200
+
+        def skill_advice(_):
+            return client.post("/generate-skill-advice", json=SAMPLE_SKILLS, headers=headers).status_code == 200
+
+        print(f"Mock latency: {args.latency}, error rate: {args.error_rate}, "
+              f"concurrency: {args.concurrency}, requests/endpoint: {args.requests}\n")
+
+        results = {
+            "evaluate-humility": run_phase(humility, args.requests, args.concurrency),
+            "generate-skill-advice": run_phase(skill_advice, args.requests, args.concurrency),
+        }
+    print_table(results)
+    print()
+    print_fallbacks(results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": {
+                    "latency": args.latency,
+                    "error_rate": args.error_rate,
+                    "concurrency": args.concurrency,
+                    "requests": args.requests,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nReport written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Serialization benchmark for list endpoints: CPU per 10k rows.
+
+Compares, for users and questionnaires:
+  model path  ORM entities -> Pydantic model per row -> FastAPI response_model
+              validation/serialization -> JSONResponse (the previous behaviour)
+  fast path   column rows -> dicts -> FastJSONResponse (fast_json.py)
+
+Rows are read from a temporary SQLite database so the query side is
+included as well as the pure serialization cost.
+
+Usage:
+    python bench_serialization.py --rows 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import io
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+
+def seed(rows: int):
+    from database import SessionLocal
+    from models import User, Questionnaire, QuestionnaireTemplate
+
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        template_ids = []
+        for week in range(1, 41):
+            template_id = str(uuid.uuid4())
+            template_ids.append(template_id)
+            db.add(QuestionnaireTemplate(
+                id=template_id, week=week, title=f"第{week}週 週次アンケート", deadline=now + timedelta(days=7)
+            ))
+        user_ids = []
+        for i in range(rows):
+            user_id = str(uuid.uuid4())
+            user_ids.append(user_id)
+            db.add(User(
+                id=user_id, email=f"bench-{i}@example.com", name=f"生徒{i}",
+                class_name="1-A", role=0, is_active=True
+            ))
+        db.flush()
+        for i in range(rows):
+            db.add(Questionnaire(
+                id=str(uuid.uuid4()), user_id=user_ids[i], template_id=template_ids[i % 40],
+                status="completed", submitted_at=now,
+                answers={"q1": 4, "q2_hasGratitude": True, "q3_didInterview": False,
+                         "q3_extractedInsight": "相手の話を最後まで聞くことが大切だと気づいた。"}
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def cpu_ms(func, repeat: int) -> float:
+    """Best-of-`repeat` process CPU time of func() in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        func()
+        elapsed = (time.process_time() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model vs fast JSON serialization for list endpoints")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Must be configured before database is imported
+    db_path = os.path.join(tempfile.mkdtemp(prefix="hughigh-serial-"), "serial.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from migrate import upgrade
+    upgrade(verbose=False)
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from database import SessionLocal
+    from sqlalchemy.orm import joinedload
+    from models import User, Questionnaire
+    from schemas import UserResponse, QuestionnaireResponse
+    from fast_json import FastJSONResponse, rows_to_dicts, ORJSON_AVAILABLE
+    from questionnaire_routes import QUESTIONNAIRE_COLUMNS
+
+    seed(args.rows)
+    db = SessionLocal()
+
+    user_field = create_response_field(name="users", type_=list[UserResponse])
+    questionnaire_field = create_response_field(name="questionnaires", type_=list[QuestionnaireResponse])
+
+    def respond_with_models(field, content):
+        serialized = asyncio.run(serialize_response(field=field, response_content=content))
+        return JSONResponse(serialized).body
+
+    def users_model_path():
+        db.expunge_all()
+        users = db.query(User).all()
+        content = [
+            UserResponse(
+                id=user.id, email=user.email, name=user.name, class_name=user.class_name,
+                role=user.role, is_active=user.is_active, created_at=user.created_at
+            )
+            for user in users
+        ]
+        return respond_with_models(user_field, content)
+
+    def users_fast_path():
+        users = db.query(
+            User.email, User.role, User.id, User.name, User.class_name, User.is_active, User.created_at
+        ).all()
+        return FastJSONResponse(rows_to_dicts(users, profile_image=None, hobbies=None, current_focus=None)).body
+
+    def questionnaires_model_path():
+        db.expunge_all()
+        questionnaires = db.query(Questionnaire).options(joinedload(Questionnaire.template)).all()
+        return respond_with_models(questionnaire_field, questionnaires)
+
+    def questionnaires_fast_path():
+        rows = db.query(*QUESTIONNAIRE_COLUMNS).join(Questionnaire.template).all()
+        return FastJSONResponse(rows_to_dicts(rows)).body
+
+    print(f"rows: {args.rows}, repeat: {args.repeat}, orjson: {ORJSON_AVAILABLE}\n")
+    print(f"{'endpoint':<18}{'model ms':>12}{'fast ms':>12}{'saved ms':>12}{'per 10k':>12}{'speedup':>10}")
+    print("-" * 76)
+    for name, slow, fast in [
+        ("users", users_model_path, users_fast_path),
+        ("questionnaires", questionnaires_model_path, questionnaires_fast_path),
+    ]:
+        slow_ms = cpu_ms(slow, args.repeat)
+        fast_ms = cpu_ms(fast, args.repeat)
+        saved = slow_ms - fast_ms
+        print(
+            f"{name:<18}{slow_ms:>12.1f}{fast_ms:>12.1f}{saved:>12.1f}"
+            f"{saved * 10000 / args.rows:>12.1f}{slow_ms / fast_ms:>9.1f}x"
+        )
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cold-start benchmark: time to import `main`, run the lifespan startup and
+serve the first request, each measured in a fresh interpreter.
+
+Exits with status 1 when the median of any phase is over its budget, so
+import-time regressions (a new eager heavy import, DDL at import time...)
+are caught before they reach Azure.
+
+Usage:
+    python bench_startup.py --runs 5
+    python bench_startup.py --import-budget-ms 800 --first-request-budget-ms 150
+    python bench_startup.py --importtime     # also list the slowest imports
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import io
+import tempfile
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+t2 = time.perf_counter()
+with TestClient(main.app) as client:
+    t3 = time.perf_counter()
+    status = client.get("/health").status_code
+    t4 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "lifespan_ms": (t3 - t2) * 1000,
+    "first_request_ms": (t4 - t3) * 1000,
+    "status": status,
+}))
+"""
+
+
+def run_child(env: dict, importtime: bool = False) -> subprocess.CompletedProcess:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", CHILD]
+    return subprocess.run(cmd, cwd=HERE, env=env, capture_output=True, text=True, check=True)
+
+
+def slowest_imports(stderr: str, top: int) -> list[tuple[int, str]]:
+    """Parse `-X importtime` output into (cumulative_us, module), slowest first."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, _, rest = line.partition(":")
+        parts = [p.strip() for p in rest.split("|")]
+        if len(parts) == 3 and parts[1].isdigit():
+            rows.append((int(parts[1]), parts[2]))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and first-request time against a budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=1000)
+    parser.add_argument("--lifespan-budget-ms", type=float, default=500)
+    parser.add_argument("--first-request-budget-ms", type=float, default=200)
+    parser.add_argument("--importtime", action="store_true", help="List the slowest imports")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if not env.get("DATABASE_URL"):
+        db_path = os.path.join(tempfile.mkdtemp(prefix="hughigh-startup-"), "startup.db")
+        env["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    samples = []
+    for _ in range(args.runs):
+        result = run_child(env)
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    budgets = {
+        "import_ms": args.import_budget_ms,
+        "lifespan_ms": args.lifespan_budget_ms,
+        "first_request_ms": args.first_request_budget_ms,
+    }
+    report = {}
+    failed = []
+    print(f"{'phase':<20}{'median':>10}{'max':>10}{'budget':>10}")
+    print("-" * 50)
+    for phase, budget in budgets.items():
+        values = [s[phase] for s in samples]
+        median = statistics.median(values)
+        report[phase] = {"median": round(median, 1), "max": round(max(values), 1), "budget": budget}
+        marker = "" if median <= budget else "  ✗ over budget"
+        print(f"{phase:<20}{median:>10.1f}{max(values):>10.1f}{budget:>10.0f}{marker}")
+        if median > budget:
+            failed.append(phase)
+
+    if args.importtime:
+        result = run_child(env, importtime=True)
+        print("\nSlowest imports (cumulative ms):")
+        for cumulative_us, module in slowest_imports(result.stderr, 15):
+            print(f"  {cumulative_us / 1000:>8.1f}  {module}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"runs": args.runs, "phases": report}, f, indent=2)
+
+    if failed:
+        print(f"\n✗ Over budget: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✓ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
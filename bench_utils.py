@@ -0,0 +1,70 @@
+"""
+Shared helpers for the benchmark and load-test scripts.
+"""
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(pct / 100 * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    """Build a latency/throughput summary (latencies in seconds, output in ms)."""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def run_load(call, total: int, concurrency: int) -> dict:
+    """
+    Run `call(i)` `total` times across `concurrency` threads.
+
+    `call` returns True on success. Returns the summary from `summarize`.
+    """
+    latencies = []
+    errors = 0
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            ok = call(i)
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, ok in pool.map(timed, range(total)):
+            latencies.append(latency)
+            if not ok:
+                errors += 1
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed, errors)
+
+
+def print_table(results: dict):
+    """Print {name: summary} as a fixed-width table."""
+    header = f"{'scenario':<28}{'reqs':>7}{'errs':>6}{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}{'rps':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, s in results.items():
+        print(
+            f"{name:<28}{s['requests']:>7}{s['errors']:>6}"
+            f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['throughput_rps']:>10.1f}"
+        )
@@ -0,0 +1,300 @@
+"""
+Per-class views for teacher dashboards.
+
+GET /classes/{class_name}/overview replaces pulling every questionnaire and
+monthly result to the client: per-week completion rates and q1 averages
+come from one grouped aggregate over the typed answer columns (see
+questionnaire_stats.py), the latest month's skill averages from a second
+query over that month's results only.
+
+GET /classes/{class_name}/submission-matrix returns the students x weeks
+grid of submission states, from the class roster and a single projected
+query over its questionnaires, in a columnar layout, with an ETag so
+polling dashboards mostly get 304s.
+
+Both are cached per class for CLASS_OVERVIEW_CACHE_SECONDS. Submitting or
+editing answers, finalizing a month, issuing questionnaires, changing
+deadlines and moving students between classes invalidate the class at
+once in the process that handled the write; other instances catch up when
+their entry expires. Cache misses read the primary, not the replica: a
+refill right after an invalidating write must see that write, or the old
+numbers (and ETag) would be cached again for the whole period.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from models import User, Questionnaire, QuestionnaireTemplate, MonthlyResult, SKILL_NAMES
+from schemas import ClassOverviewResponse, SubmissionMatrixResponse
+from auth import get_current_user
+from database import get_db
+from query_tracker import query_budget
+from fast_json import FastJSONResponse, dumps
+from questionnaire_stats import AnswerStats, answer_stats_query, count_if
+
+router = APIRouter(prefix="/classes", tags=["classes"])
+
+CLASS_OVERVIEW_CACHE_SECONDS = float(os.getenv("CLASS_OVERVIEW_CACHE_SECONDS", "30"))
+
+
+class ClassCache:
+    """
+    Computed values per class, valid for `ttl` seconds or until invalidated.
+
+    Every invalidation bumps the class's generation; a value computed while
+    an invalidation happened is not stored, so a slow read that started
+    before a submit cannot put the old numbers back.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, object]] = {}  # class -> (expires_at, value)
+        self._generations: dict[str, int] = {}
+        self._epoch = 0  # bumped by invalidate_all
+        self._lock = threading.Lock()
+
+    def get(self, class_name: str):
+        entry = self._entries.get(class_name)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def generation(self, class_name: str) -> tuple[int, int]:
+        return self._epoch, self._generations.get(class_name, 0)
+
+    def put(self, class_name: str, value, generation: tuple[int, int]):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if self.generation(class_name) == generation:
+                self._entries[class_name] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, class_name: str):
+        with self._lock:
+            self._generations[class_name] = self._generations.get(class_name, 0) + 1
+            self._entries.pop(class_name, None)
+
+    def invalidate_all(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+
+_overview_cache = ClassCache(CLASS_OVERVIEW_CACHE_SECONDS)
+_matrix_cache = ClassCache(CLASS_OVERVIEW_CACHE_SECONDS)  # class -> (etag, body)
+
+# Submission matrix cell codes
+CELL_COMPLETED = "c"
+CELL_PENDING = "p"
+CELL_OVERDUE = "o"
+CELL_NOT_ISSUED = "-"
+
+
+def invalidate_class(class_name: Optional[str]):
+    """Drop the cached views of a class after a write affecting it (no-op for users without a class)."""
+    if class_name is not None:
+        _overview_cache.invalidate(class_name)
+        _matrix_cache.invalidate(class_name)
+
+
+def invalidate_all_classes():
+    _overview_cache.invalidate_all()
+    _matrix_cache.invalidate_all()
+
+
+def _class_students(class_name: str):
+    return (User.class_name == class_name, User.role == 0, User.deleted_at.is_(None))
+
+
+def _week_overview(db: Session, class_name: str) -> list[dict]:
+    """Issued/completed counts and q1 average per week, one grouped aggregate."""
+    completed = count_if(Questionnaire.status == "completed").label("completed")
+    statement = answer_stats_query(
+        *_class_students(class_name), group_by=(QuestionnaireTemplate.week,)
+    ).add_columns(completed).join(
+        User, Questionnaire.user_id == User.id
+    ).join(
+        QuestionnaireTemplate, Questionnaire.template_id == QuestionnaireTemplate.id
+    ).order_by(QuestionnaireTemplate.week.desc())
+
+    weeks = []
+    for row in db.execute(statement):
+        stats = AnswerStats.from_row(row)
+        issued = stats.questionnaires
+        weeks.append({
+            "week": row.week,
+            "issued": issued,
+            "completed": int(row.completed),
+            "completion_rate": round(row.completed / issued, 4) if issued else None,
+            "q1_average": round(stats.q1_average, 2) if stats.q1_average is not None else None,
+        })
+    return weeks
+
+
+def _latest_month_overview(db: Session, class_name: str) -> Optional[dict]:
+    """Result count, level and per-skill averages of the class's latest finalized month."""
+    month_key = MonthlyResult.year * 12 + MonthlyResult.month
+    latest = select(func.max(month_key)).join(
+        User, MonthlyResult.user_id == User.id
+    ).where(*_class_students(class_name)).scalar_subquery()
+
+    # One row per student of that month; the skills are averaged here because
+    # SQLite's json_extract cannot match the \u-escaped keys stored by json.dumps
+    rows = db.execute(
+        select(MonthlyResult.year, MonthlyResult.month, MonthlyResult.level, MonthlyResult.skills).join(
+            User, MonthlyResult.user_id == User.id
+        ).where(*_class_students(class_name), month_key == latest)
+    ).all()
+    if not rows:
+        return None
+
+    skill_averages = {}
+    for name in SKILL_NAMES:
+        scores = [row.skills[name] for row in rows if (row.skills or {}).get(name) is not None]
+        skill_averages[name] = round(sum(scores) / len(scores), 2) if scores else None
+    return {
+        "year": rows[0].year,
+        "month": rows[0].month,
+        "results": len(rows),
+        "level_average": round(sum(row.level for row in rows) / len(rows), 2),
+        "skill_averages": skill_averages,
+    }
+
+
+@router.get("/{class_name}/overview", response_model=ClassOverviewResponse)
+@query_budget(3)
+def get_class_overview(
+    class_name: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Overview of a class: per-week completion and q1 average, latest month's skill averages.
+
+    - Only teachers and admins can access this endpoint
+    - Counts cover the class's current students
+    - Cached per class (see `generated_at`); writes to the class invalidate it
+    """
+    if current_user.role not in [1, 2]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers and administrators can view class overviews"
+        )
+
+    overview = _overview_cache.get(class_name)
+    if overview is None:
+        generation = _overview_cache.generation(class_name)
+        overview = {
+            "class_name": class_name,
+            "weeks": _week_overview(db, class_name),
+            "latest_month": _latest_month_overview(db, class_name),
+            "generated_at": datetime.utcnow(),
+        }
+        _overview_cache.put(class_name, overview, generation)
+
+    return FastJSONResponse(overview)
+
+
+def _submission_matrix(db: Session, class_name: str) -> dict:
+    """
+    Students x weeks grid: the class roster, then one query projecting only
+    the cell fields. Students without any questionnaire get a row of "-".
+    """
+    students = db.execute(
+        select(User.id).where(*_class_students(class_name)).order_by(User.id)
+    ).scalars().all()
+    rows = db.execute(
+        select(
+            Questionnaire.user_id, QuestionnaireTemplate.week, Questionnaire.status,
+            Questionnaire.submitted_at, QuestionnaireTemplate.deadline
+        ).join(
+            User, Questionnaire.user_id == User.id
+        ).join(
+            QuestionnaireTemplate, Questionnaire.template_id == QuestionnaireTemplate.id
+        ).where(*_class_students(class_name))
+    ).tuples().all()
+
+    now = datetime.utcnow()
+    deadlines = {}
+    for _, week, _, _, deadline in rows:
+        deadlines[week] = deadline
+    weeks = sorted(deadlines)
+    column = {week: j for j, week in enumerate(weeks)}
+    line = {user_id: i for i, user_id in enumerate(students)}
+
+    cells = [[CELL_NOT_ISSUED] * len(weeks) for _ in students]
+    submitted_at = [[None] * len(weeks) for _ in students]
+    for user_id, week, state, submitted, deadline in rows:
+        i = line.get(user_id)
+        if i is None:  # Joined the class between the two queries
+            continue
+        j = column[week]
+        if state == "completed":
+            cells[i][j] = CELL_COMPLETED
+            submitted_at[i][j] = submitted
+        else:
+            cells[i][j] = CELL_OVERDUE if deadline < now else CELL_PENDING
+
+    return {
+        "class_name": class_name,
+        "weeks": weeks,
+        "deadlines": [deadlines[week] for week in weeks],
+        "students": students,
+        "status": ["".join(line_cells) for line_cells in cells],
+        "submitted_at": submitted_at,
+        "generated_at": now,
+    }
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/{class_name}/submission-matrix", response_model=SubmissionMatrixResponse)
+@query_budget(3)
+def get_submission_matrix(
+    class_name: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Submission state of every student of a class for every issued week.
+
+    - Only teachers and admins can access this endpoint
+    - Columnar: `status[i][j]` is student `students[i]` in week `weeks[j]`
+      ("c" completed, "p" pending, "o" overdue, "-" not issued) and
+      `submitted_at[i][j]` the submission time of completed cells
+    - Sends an ETag; polling with If-None-Match gets 304 until the matrix changes
+    """
+    if current_user.role not in [1, 2]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers and administrators can view submission matrices"
+        )
+
+    cached = _matrix_cache.get(class_name)
+    if cached is None:
+        generation = _matrix_cache.generation(class_name)
+        matrix = _submission_matrix(db, class_name)
+        # The ETag covers the cells only, so regenerating an unchanged matrix keeps it
+        etag = '"%s"' % hashlib.sha256(dumps({**matrix, "generated_at": None})).hexdigest()[:32]
+        cached = (etag, dumps(matrix))
+        _matrix_cache.put(class_name, cached, generation)
+
+    etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,130 @@
+"""
+Lazily loaded clients for optional external services (OpenAI, Google).
+
+`openai`, `httpx` and `google.auth` are heavy to import, so importing
+`main` does not touch them. They are loaded on first use, or up front by
+`init_clients()` from the application warm-up when the service is
+configured. `close_clients()` releases the shared HTTP client on shutdown.
+
+Google's public signing certificates are cached in-process for as long as
+their Cache-Control max-age allows, instead of being downloaded on every
+Google login.
+"""
+
+import importlib.util
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+
+from metrics import observe_dependency
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# Optional override, e.g. http://127.0.0.1:8001/v1 for the local mock (openai_mock.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "")
+
+_lock = threading.Lock()
+_openai_client = None
+_http_client = None
+_google_request = None
+
+
+def openai_available() -> bool:
+    """Whether the OpenAI SDK is installed (checked without importing it)."""
+    return importlib.util.find_spec("openai") is not None
+
+
+def openai_enabled() -> bool:
+    """OpenAI calls are made only when the SDK is installed and a key is configured."""
+    return bool(OPENAI_API_KEY) and openai_available()
+
+
+def get_openai_client():
+    """Shared OpenAI client, built on first use."""
+    global _openai_client, _http_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                from openai import OpenAI
+                import httpx
+
+                _http_client = httpx.Client(proxy=None)
+                _openai_client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, http_client=_http_client)
+    return _openai_client
+
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_CERTS_DEFAULT_TTL = 3600
+
+
+class _CachingGoogleRequest:
+    """google.auth transport Request that caches successful certificate GETs."""
+
+    def __init__(self, request):
+        self._request = request
+        self._cache = {}  # url -> (expires_at, response)
+        self._cache_lock = threading.Lock()
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        if method != "GET" or url != GOOGLE_CERTS_URL:
+            return self._request(url, method=method, body=body, headers=headers, timeout=timeout, **kwargs)
+
+        cached = self._cache.get(url)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        with observe_dependency("google_certs"):
+            response = self._request(url, method=method, headers=headers, timeout=timeout, **kwargs)
+        if response.status == 200:
+            match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+            ttl = int(match.group(1)) if match else GOOGLE_CERTS_DEFAULT_TTL
+            with self._cache_lock:
+                self._cache[url] = (time.monotonic() + ttl, response)
+        return response
+
+
+def _get_google_request():
+    global _google_request
+    if _google_request is None:
+        with _lock:
+            if _google_request is None:
+                from google.auth.transport import requests as google_requests
+
+                _google_request = _CachingGoogleRequest(google_requests.Request())
+    return _google_request
+
+
+def verify_google_id_token(credential: str) -> dict:
+    """Verify a Google ID token for GOOGLE_CLIENT_ID and return its claims."""
+    from google.oauth2 import id_token
+
+    request = _get_google_request()
+    with observe_dependency("google"):
+        return id_token.verify_oauth2_token(credential, request, GOOGLE_CLIENT_ID)
+
+
+def prefetch_google_certs():
+    """Download (and cache) Google's signing certificates ahead of the first login."""
+    _get_google_request()(GOOGLE_CERTS_URL, method="GET")
+
+
+def init_clients():
+    """Build the clients for configured services (called from the app warm-up)."""
+    if openai_enabled():
+        get_openai_client()
+    if GOOGLE_CLIENT_ID:
+        _get_google_request()
+
+
+def close_clients():
+    """Release pooled connections held by the shared clients."""
+    global _openai_client, _http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        _openai_client = None
+        _http_client = None
@@ -0,0 +1,87 @@
+"""
+Shared pytest setup: a throwaway SQLite database migrated to head, the app
+without background work, and user fixtures.
+
+The environment is set here, before any test module imports the app, so
+every module in a run shares the same database and settings.
+"""
+
+import os
+import tempfile
+import uuid
+
+_db_dir = tempfile.mkdtemp(prefix="hughigh-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ["WARMUP_ENABLED"] = "false"
+os.environ["USER_PURGE_ENABLED"] = "false"
+os.environ["LOGIN_RATE_ENABLED"] = "false"
+os.environ["QUERY_BUDGET_STRICT"] = "1"
+os.environ.setdefault("OPENAI_API_KEY", "")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from auth import get_password_hash
+from database import SessionLocal
+from migrate import upgrade
+from models import User
+
+upgrade(verbose=False)
+
+import main  # noqa: E402  (after the schema exists)
+
+PASSWORD = "password123"
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def add_user(db):
+    """add_user(role, class_name=None) -> a new active user whose password is PASSWORD."""
+    def add(role: int, class_name: str = None) -> User:
+        user = User(
+            id=str(uuid.uuid4()),
+            email=f"{uuid.uuid4().hex[:12]}@example.com",
+            hashed_password=get_password_hash(PASSWORD),
+            name="Test",
+            class_name=class_name,
+            role=role,
+            is_active=True,
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+    return add
+
+
+@pytest.fixture
+def admin(add_user):
+    return add_user(role=2)
+
+
+@pytest.fixture
+def student(add_user):
+    return add_user(role=0, class_name="1-A")
+
+
+@pytest.fixture
+def login(client):
+    """login(user) -> the /auth/login response body."""
+    def log_in(user: User) -> dict:
+        response = client.post("/auth/login", json={"email": user.email, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return response.json()
+    return log_in
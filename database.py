@@ -17,6 +17,14 @@ engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=ssl_args)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 読み取り専用レプリカ（任意、read_replica.py 参照）
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+replica_engine = create_engine(DATABASE_REPLICA_URL, connect_args=ssl_args) if DATABASE_REPLICA_URL else None
+
+ReplicaSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else SessionLocal
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -0,0 +1,288 @@
+"""
+Export monthly results to Parquet for analytics.
+
+Writes one Parquet file per month, Hive-partitioned as
+`<out>/year=YYYY/month=M/part-0.parquet`, with the seven skills unpacked from
+the `skills` JSON into typed integer columns next to the student's email,
+name and class. Any tool that reads Hive partitions (pyarrow.dataset,
+DuckDB, Spark, BigQuery external tables) can query the directory directly.
+
+Runs are incremental: `<out>/_state.json` keeps a watermark (the start
+time of the last run, minus EXPORT_WATERMARK_OVERLAP_MINUTES), and the next
+run rebuilds only the partitions that contain results updated since then
+(or results of students updated since, for class/name changes). The
+overlap covers writes that committed after the run read them and writer
+hosts whose clocks lag the exporter's; rebuilding a month twice is
+harmless. Each partition is rebuilt from the database in full and swapped
+in atomically, so re-processing is always safe. Deletions leave no
+`updated_at` behind, so the state also keeps each partition's row count
+and a month whose count has changed is rebuilt too: a student purged by
+user_purge.py disappears from the export on the next run. Soft-deleted
+students are left out as soon as they are marked. A state file from
+before the counts were kept has none to compare with: that run rebuilds
+only the months with changed `updated_at` rows and records the counts.
+
+Requires pyarrow (optional dependency, not needed by the API):
+    pip install pyarrow
+
+Usage (e.g. nightly):
+    python export_monthly_results.py --out exports/monthly_results
+    python export_monthly_results.py --out exports/monthly_results --full
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import io
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, or_
+
+from models import User, MonthlyResult
+
+# Optional pyarrow - the script reports how to install it when missing
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+STATE_FILE = "_state.json"
+BATCH_SIZE = 5000
+WATERMARK_OVERLAP = timedelta(minutes=float(os.getenv("EXPORT_WATERMARK_OVERLAP_MINUTES", "10")))
+
+# skills JSON key -> Parquet column
+SKILL_COLUMNS = {
+    "戦略的計画力": "strategic_planning",
+    "課題設定・構想力": "problem_setting",
+    "巻き込む力": "involvement",
+    "対話する力": "dialogue",
+    "実行する力": "execution",
+    "完遂する力": "completion",
+    "謙虚である力": "humility",
+}
+
+EXPORT_COLUMNS = (
+    MonthlyResult.id, MonthlyResult.user_id, User.email, User.name, User.class_name,
+    MonthlyResult.year, MonthlyResult.month, MonthlyResult.level, MonthlyResult.skills,
+    MonthlyResult.ai_comment, MonthlyResult.created_at, MonthlyResult.updated_at,
+)
+
+
+def arrow_schema():
+    fields = [
+        ("id", pa.string()),
+        ("user_id", pa.string()),
+        ("email", pa.string()),
+        ("name", pa.string()),
+        ("class_name", pa.string()),
+        # int32 to match the type readers infer for the year=/month= directories
+        ("year", pa.int32()),
+        ("month", pa.int32()),
+        ("level", pa.int8()),
+    ]
+    fields += [(column, pa.int16()) for column in SKILL_COLUMNS.values()]
+    fields += [
+        ("ai_comment", pa.string()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+    ]
+    return pa.schema(fields)
+
+
+def load_state(out_dir: str) -> dict:
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(out_dir: str, state: dict):
+    path = os.path.join(out_dir, STATE_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def partition_counts(db) -> dict[tuple[int, int], int]:
+    """Exported rows per (year, month): results of students that are not deleted."""
+    query = select(MonthlyResult.year, MonthlyResult.month, func.count(MonthlyResult.id)).join(
+        User, MonthlyResult.user_id == User.id
+    ).where(User.deleted_at.is_(None)).group_by(MonthlyResult.year, MonthlyResult.month)
+    return {(year, month): count for year, month, count in db.execute(query)}
+
+
+def _count_key(year: int, month: int) -> str:
+    return f"{year}-{month}"
+
+
+def changed_partitions(db, since: datetime = None, counts: dict = None, exported_counts: dict = None) -> set[tuple[int, int]]:
+    """
+    (year, month) partitions to rebuild: with results or students updated
+    at/after `since`, or whose row count in `counts` differs from the one
+    last exported (`exported_counts`, "year-month" -> rows; None when the
+    state has no counts yet). All if `since` is None.
+    """
+    if counts is None:
+        counts = partition_counts(db)
+    if since is None:
+        return set(counts)
+
+    query = select(MonthlyResult.year, MonthlyResult.month).distinct().join(
+        User, MonthlyResult.user_id == User.id
+    ).where(
+        or_(MonthlyResult.updated_at >= since, User.updated_at >= since)
+    )
+    changed = {(year, month) for year, month in db.execute(query)}
+
+    # Deleted rows: months whose count moved (incl. months that are now empty).
+    # A state written before counts were kept has none to compare with; its
+    # run relies on `updated_at` alone and saves the counts for the next one.
+    if exported_counts is None:
+        return changed
+    exported = {tuple(int(part) for part in key.split("-")): rows for key, rows in exported_counts.items()}
+    for partition in set(counts) | set(exported):
+        if counts.get(partition, 0) != exported.get(partition):
+            changed.add(partition)
+    return changed
+
+
+def flatten(row) -> dict:
+    """One MonthlyResult row (with user columns) as a flat export record."""
+    record = {
+        "id": row.id,
+        "user_id": row.user_id,
+        "email": row.email,
+        "name": row.name,
+        "class_name": row.class_name,
+        "year": row.year,
+        "month": row.month,
+        "level": row.level,
+    }
+    skills = row.skills or {}
+    for key, column in SKILL_COLUMNS.items():
+        record[column] = skills.get(key)
+    record["ai_comment"] = row.ai_comment
+    record["created_at"] = row.created_at
+    record["updated_at"] = row.updated_at
+    return record
+
+
+def partition_path(out_dir: str, year: int, month: int) -> str:
+    return os.path.join(out_dir, f"year={year}", f"month={month}", "part-0.parquet")
+
+
+def write_partition(db, out_dir: str, year: int, month: int, schema) -> int:
+    """Rebuild one partition from the database, streaming rows in batches. Returns rows written."""
+    path = partition_path(out_dir, year, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+
+    statement = select(*EXPORT_COLUMNS).join(
+        User, MonthlyResult.user_id == User.id
+    ).where(
+        MonthlyResult.year == year,
+        MonthlyResult.month == month,
+        User.deleted_at.is_(None)
+    ).order_by(User.class_name, MonthlyResult.user_id).execution_options(yield_per=BATCH_SIZE)
+
+    written = 0
+    with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+        for partition in db.execute(statement).partitions():
+            records = [flatten(row) for row in partition]
+            writer.write_batch(pa.RecordBatch.from_pylist(records, schema=schema))
+            written += len(records)
+
+    if written:
+        os.replace(tmp, path)
+    else:
+        # Every result of the month is gone
+        os.remove(tmp)
+        if os.path.exists(path):
+            os.remove(path)
+    return written
+
+
+def remove_stale_partitions(out_dir: str, keep: set[tuple[int, int]]):
+    """Delete partition files for months that no longer have any results."""
+    for path in glob.glob(os.path.join(out_dir, "year=*", "month=*", "part-0.parquet")):
+        month_dir = os.path.dirname(path)
+        year = int(os.path.basename(os.path.dirname(month_dir)).split("=", 1)[1])
+        month = int(os.path.basename(month_dir).split("=", 1)[1])
+        if (year, month) not in keep:
+            os.remove(path)
+
+
+def export(db, out_dir: str, full: bool = False, verbose: bool = True) -> dict:
+    """Export changed (or, with full=True, all) partitions and advance the watermark."""
+    os.makedirs(out_dir, exist_ok=True)
+    state = {} if full else load_state(out_dir)
+    since = datetime.fromisoformat(state["watermark"]) if state.get("watermark") else None
+
+    # Take the new watermark before reading, so rows changed during the run are picked up next time;
+    # it overlaps the previous run for late commits and clock skew between hosts
+    started_at = datetime.utcnow()
+    counts = partition_counts(db)
+    partitions = sorted(changed_partitions(db, since, counts, state.get("counts")))
+
+    if since is None:
+        remove_stale_partitions(out_dir, set(partitions))
+
+    schema = arrow_schema()
+    total = 0
+    for year, month in partitions:
+        rows = write_partition(db, out_dir, year, month, schema)
+        total += rows
+        if verbose:
+            print(f"  year={year}/month={month}: {rows} rows")
+
+    state = {
+        "watermark": (started_at - WATERMARK_OVERLAP).isoformat(),
+        "last_run_at": datetime.utcnow().isoformat(),
+        # Rows per partition as of the start of this run, to spot deletions next time
+        "counts": {_count_key(year, month): rows for (year, month), rows in sorted(counts.items())},
+    }
+    save_state(out_dir, state)
+    return {"partitions": len(partitions), "rows": total, "since": since.isoformat() if since else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export monthly results to partitioned Parquet")
+    parser.add_argument("--out", default="exports/monthly_results", help="Output directory")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and rebuild every partition")
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        print("✗ pyarrow is not installed. Install it with: pip install pyarrow")
+        sys.exit(1)
+
+    from database import SessionLocal
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        summary = export(db, args.out, full=args.full)
+    finally:
+        db.close()
+
+    scope = "full rebuild" if summary["since"] is None else f"changes since {summary['since']}"
+    print(
+        f"✓ Exported {summary['rows']} rows in {summary['partitions']} partition(s) "
+        f"({scope}) in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    main()
@@ -0,0 +1,53 @@
+"""
+Fast JSON responses for list endpoints.
+
+The default path builds a Pydantic model per ORM row, then FastAPI validates
+the list against `response_model` again and serializes it with `json`.
+List endpoints instead select plain column rows and hand them straight to
+`FastJSONResponse`, which serializes with orjson (falling back to the
+standard library when it is not installed). Returning a Response skips
+FastAPI's response validation; `response_model` stays on the route for the
+OpenAPI docs, so the shape must be kept in sync with the schema by hand.
+
+See bench_serialization.py for the CPU saved per 10k rows.
+"""
+
+from datetime import date, datetime
+from typing import Any, Iterable
+
+from fastapi.responses import Response
+
+# Optional orjson - falls back to the standard library
+try:
+    import orjson
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content)
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+
+    def _default(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    def dumps(content: Any) -> bytes:
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+    ORJSON_AVAILABLE = False
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_to_dicts(rows: Iterable, **extra) -> list[dict]:
+    """Turn SQLAlchemy column rows into dicts, adding constant `extra` keys."""
+    if extra:
+        return [{**row._asdict(), **extra} for row in rows]
+    return [row._asdict() for row in rows]
@@ -0,0 +1,150 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func, and_
+from sqlalchemy.orm import Session, aliased
+from typing import Optional
+
+from read_replica import get_read_db
+from models import User, Questionnaire, GratitudeEdge
+from schemas import GratitudeReceivedResponse, GratitudeInDegreeResponse
+from auth import get_current_user
+from query_tracker import query_budget
+from fast_json import FastJSONResponse
+
+router = APIRouter(prefix="/gratitude", tags=["gratitude"])
+
+MAX_PAGE_SIZE = 100
+
+
+def gratitude_targets(answers: Optional[dict]) -> list[tuple[str, str]]:
+    """(student_id, message) pairs thanked in a questionnaire's answers, legacy fields included."""
+    answers = answers or {}
+    if not answers.get("q2_hasGratitude"):
+        return []
+
+    targets = [
+        (target.get("studentId"), target.get("message"))
+        for target in answers.get("q2_gratitudeTargets") or []
+    ]
+    # Legacy single-target fields
+    if not targets and answers.get("q2_targetStudentId"):
+        targets = [(answers["q2_targetStudentId"], answers.get("q2_message"))]
+    return [(student_id, message or None) for student_id, message in targets if student_id]
+
+
+def sync_gratitude_edges(db: Session, questionnaire: Questionnaire):
+    """
+    Replace the questionnaire's gratitude edges with the targets in its answers.
+
+    Targets that are not existing users (or the author) are skipped. The
+    caller commits.
+    """
+    db.query(GratitudeEdge).filter(
+        GratitudeEdge.questionnaire_id == questionnaire.id
+    ).delete(synchronize_session=False)
+
+    targets = gratitude_targets(questionnaire.answers)
+    if not targets:
+        return
+
+    existing = {
+        user_id for (user_id,) in db.query(User.id).filter(
+            User.id.in_({t for t, _ in targets}), User.deleted_at.is_(None)
+        )
+    }
+    seen = set()
+    for to_user_id, message in targets:
+        if to_user_id not in existing or to_user_id == questionnaire.user_id or to_user_id in seen:
+            continue
+        seen.add(to_user_id)
+        db.add(GratitudeEdge(
+            questionnaire_id=questionnaire.id,
+            from_user_id=questionnaire.user_id,
+            to_user_id=to_user_id,
+            week=questionnaire.week,
+            message=message
+        ))
+
+
+@router.get("/received", response_model=GratitudeReceivedResponse)
+@query_budget(2)
+def get_gratitude_received(
+    user_id: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get the thanks a student has received, newest first.
+
+    - Students can only see their own (user_id defaults to the current user)
+    - Paginated: pass `next_cursor` from the previous page as `cursor`
+    """
+    target_id = user_id or current_user.id
+    if current_user.role == 0 and target_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    sender = aliased(User)
+    query = db.query(
+        GratitudeEdge.id, GratitudeEdge.from_user_id, sender.name.label("from_name"),
+        sender.class_name.label("from_class_name"), GratitudeEdge.week, GratitudeEdge.message,
+        GratitudeEdge.created_at
+    ).join(
+        sender, GratitudeEdge.from_user_id == sender.id
+    ).filter(
+        GratitudeEdge.to_user_id == target_id
+    )
+    if cursor is not None:
+        query = query.filter(GratitudeEdge.id < cursor)
+    # One extra row tells whether there is a next page
+    rows = query.order_by(GratitudeEdge.id.desc()).limit(limit + 1).all()
+
+    items = [row._asdict() for row in rows[:limit]]
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor})
+
+
+@router.get("/classes/{class_name}/in-degree", response_model=list[GratitudeInDegreeResponse])
+@query_budget(2)
+def get_class_gratitude_in_degree(
+    class_name: str,
+    week: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Number of thanks each student of a class received (optionally in one week), most first.
+
+    - Only teachers and admins can access this endpoint
+    - Students with no thanks are included with 0
+    """
+    if current_user.role not in [1, 2]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers and administrators can view class statistics"
+        )
+
+    edge_condition = GratitudeEdge.to_user_id == User.id
+    if week is not None:
+        edge_condition = and_(edge_condition, GratitudeEdge.week == week)
+
+    received = func.count(GratitudeEdge.id)
+    rows = db.query(
+        User.id.label("user_id"), User.name, received.label("received")
+    ).outerjoin(
+        GratitudeEdge, edge_condition
+    ).filter(
+        User.class_name == class_name,
+        User.role == 0,
+        User.is_active == True
+    ).group_by(
+        User.id, User.name
+    ).order_by(
+        received.desc(), User.name
+    ).all()
+
+    return FastJSONResponse([row._asdict() for row in rows])
@@ -0,0 +1,265 @@
+"""
+In-process load test for the core student and teacher flows.
+
+Seeds a synthetic school into SQLite (default, a fresh temp file) or any
+DATABASE_URL such as a local MySQL, then replays realistic traffic mixes
+against the FastAPI `app` through TestClient:
+
+    login_storm          morning rush of students logging in (bcrypt bound)
+    deadline_submits     deadline-night questionnaire submits and re-edits
+    month_end_finalize   every student finalizing the current month
+    teacher_polling      teachers polling dashboards (lists of questionnaires,
+                         monthly results and students)
+
+Writes a machine-readable JSON report. With --baseline the run is compared
+against a stored report and exits with status 1 on regression, so CI can
+gate on it:
+
+    python loadtest.py --students 200 --report loadtest_report.json
+    python loadtest.py --report current.json --baseline loadtest_baseline.json --tolerance 0.3
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import io
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from bench_utils import run_load, print_table
+
+PASSWORD = "password123"
+
+SAMPLE_ANSWERS = {
+    "q1": 4,
+    "q2_hasGratitude": True,
+    "q2_gratitudeTargets": [],
+    "q3_didInterview": True,
+    "q3_didConduct": True,
+    "q3_conductContent": "部活の後輩に目標についてインタビューしました。",
+    "q3_couldExtract": True,
+    "q3_extractedInsight": "目標を言葉にすると行動が変わることに気づいた。",
+    "q3_didReceive": False,
+}
+
+
+def seed(students: int, teachers: int, rng: random.Random) -> dict:
+    """Create users and one open questionnaire per student. Returns ids for the scenarios."""
+    from database import SessionLocal
+    from sqlalchemy import func
+    from models import User, Questionnaire, QuestionnaireTemplate
+    from auth import get_password_hash
+
+    # One hash shared by everyone keeps seeding fast while logins still pay a full verify
+    hashed = get_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    run_id = uuid.uuid4().hex[:8]
+    classes = [f"{grade}-{section}" for grade in (1, 2, 3) for section in "ABCD"]
+
+    seeded = {"students": [], "teachers": []}
+    db = SessionLocal()
+    try:
+        # A template of its own (next free week) so the run never hits an expired deadline
+        last_week = db.query(func.max(QuestionnaireTemplate.week)).scalar() or 0
+        template = QuestionnaireTemplate(
+            id=str(uuid.uuid4()),
+            week=last_week + 1,
+            title=f"第{last_week + 1}週 週次アンケート",
+            deadline=now + timedelta(days=7)
+        )
+        db.add(template)
+
+        for i in range(students):
+            user = User(
+                id=str(uuid.uuid4()),
+                email=f"load-{run_id}-s{i}@example.com",
+                hashed_password=hashed,
+                name=f"生徒{i}",
+                class_name=rng.choice(classes),
+                role=0,
+                is_active=True
+            )
+            db.add(user)
+            questionnaire = Questionnaire(
+                id=str(uuid.uuid4()),
+                user_id=user.id,
+                template_id=template.id,
+                status="pending",
+                created_at=now
+            )
+            db.add(questionnaire)
+            seeded["students"].append({"email": user.email, "questionnaire_id": questionnaire.id})
+
+        for i in range(teachers):
+            user = User(
+                id=str(uuid.uuid4()),
+                email=f"load-{run_id}-t{i}@example.com",
+                hashed_password=hashed,
+                name=f"先生{i}",
+                role=1,
+                is_active=True
+            )
+            db.add(user)
+            seeded["teachers"].append({"email": user.email})
+
+        db.commit()
+    finally:
+        db.close()
+
+    return seeded
+
+
+def login(client, email: str) -> str:
+    response = client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def run_scenarios(client, seeded: dict, args, rng: random.Random) -> dict:
+    students = seeded["students"]
+    teachers = seeded["teachers"]
+    results = {}
+
+    # Morning login storm - also collects the tokens used by the later phases
+    tokens = [None] * len(students)
+
+    def login_storm(i):
+        idx = i % len(students)
+        tokens[idx] = login(client, students[idx]["email"])
+        return True
+
+    results["login_storm"] = run_load(login_storm, max(args.logins, len(students)), args.concurrency)
+
+    # Deadline night: first pass submits, the rest re-edit before the deadline
+    submit_body = {"answers": SAMPLE_ANSWERS}
+
+    def deadline_submits(i):
+        idx = i % len(students)
+        headers = {"Authorization": f"Bearer {tokens[idx]}"}
+        questionnaire_id = students[idx]["questionnaire_id"]
+        if i < len(students):
+            response = client.post(f"/questionnaires/{questionnaire_id}/submit", json=submit_body, headers=headers)
+        else:
+            response = client.put(f"/questionnaires/{questionnaire_id}", json=submit_body, headers=headers)
+        return response.status_code == 200
+
+    results["deadline_submits"] = run_load(deadline_submits, max(args.submits, len(students)), args.concurrency)
+
+    # Month end: every student finalizes once
+    def month_end_finalize(i):
+        headers = {"Authorization": f"Bearer {tokens[i]}"}
+        return client.post("/monthly-results/finalize", headers=headers).status_code == 200
+
+    results["month_end_finalize"] = run_load(month_end_finalize, len(students), args.concurrency)
+
+    # Teacher dashboards polling a weighted mix of list endpoints
+    teacher_tokens = [login(client, t["email"]) for t in teachers]
+    endpoints = ["/questionnaires"] * 4 + ["/monthly-results"] * 3 + ["/students"] * 2 + ["/auth/me"]
+    plan = [(rng.randrange(len(teacher_tokens)), rng.choice(endpoints)) for _ in range(args.polls)]
+
+    def teacher_polling(i):
+        teacher_idx, path = plan[i]
+        headers = {"Authorization": f"Bearer {teacher_tokens[teacher_idx]}"}
+        return client.get(path, headers=headers).status_code == 200
+
+    results["teacher_polling"] = run_load(teacher_polling, args.polls, args.concurrency)
+
+    return results
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return human-readable regressions of `report` against `baseline`."""
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = report["scenarios"].get(name)
+        if current is None:
+            regressions.append(f"{name}: missing from current run")
+            continue
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {current['errors']}")
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[key] > 0 and current[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {base[key]} -> {current[key]}")
+        if base["throughput_rps"] > 0 and current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput_rps {base['throughput_rps']} -> {current['throughput_rps']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test for HugHigh student/teacher flows")
+    parser.add_argument("--database-url", help="Defaults to a fresh SQLite file (e.g. mysql+pymysql://... for local MySQL)")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--teachers", type=int, default=5)
+    parser.add_argument("--logins", type=int, default=0, help="Login requests (default: one per student)")
+    parser.add_argument("--submits", type=int, default=0, help="Submit/edit requests (default: one per student)")
+    parser.add_argument("--polls", type=int, default=300, help="Teacher dashboard requests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--report", default="loadtest_report.json", help="Where to write the JSON report")
+    parser.add_argument("--baseline", help="Stored report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # Must be configured before main/database are imported
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    elif not os.getenv("DATABASE_URL"):
+        db_path = os.path.join(tempfile.mkdtemp(prefix="hughigh-load-"), "load.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    # Keep the AI endpoints on their offline fallback
+    os.environ.setdefault("OPENAI_API_KEY", "")
+    # Every simulated student shares the TestClient address, like a school NAT
+    os.environ.setdefault("LOGIN_RATE_IP_ALLOWANCES", "testclient=0")
+
+    from migrate import upgrade
+    upgrade(verbose=False)
+
+    from fastapi.testclient import TestClient
+    from main import app
+    from database import engine
+
+    rng = random.Random(args.seed)
+    seeded = seed(args.students, args.teachers, rng)
+    # Entering the client runs the app lifespan, as a real worker would
+    with TestClient(app) as client:
+        results = run_scenarios(client, seeded, args, rng)
+    print_table(results)
+
+    report = {
+        "meta": {
+            "generated_at": datetime.utcnow().isoformat(),
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "students": args.students,
+            "teachers": args.teachers,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.report}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n✗ Regressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\n✓ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,74 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from fastapi.responses import PlainTextResponse, JSONResponse
+from sqlalchemy.orm import Session, joinedload
+from datetime import datetime, timedelta
+from typing import Optional
+import math
 import uuid
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 
-from database import get_db, engine, Base
-from models import User, UserGoogleAccount, AuditLog
+from database import get_db, engine, replica_engine
+from models import User, UserGoogleAccount, RefreshToken
 from schemas import (
     LoginRequest, LoginResponse, UserResponse,
     GoogleLoginRequest, Token, UserCreateRequest, UserCreateGoogleRequest,
-    UserUpdateRequest, ProfileUpdateRequest
+    UserUpdateRequest, ProfileUpdateRequest, UserDeletionResponse,
+    RefreshRequest, RefreshResponse, LogoutRequest
 )
 from auth import (
-    verify_password, create_access_token, get_current_user,
+    verify_password, create_access_token, get_current_user, get_current_db_user,
+    access_token_claims, bump_token_version, publish_token_version,
     ACCESS_TOKEN_EXPIRE_MINUTES, get_password_hash
 )
+from audit import create_audit_log
 from questionnaire_routes import router as questionnaire_router
 from monthly_result_routes import router as monthly_result_router
 from talent_result_routes import router as talent_result_router
+from user_import_routes import router as user_import_router
+from gratitude_routes import router as gratitude_router
+from activity_routes import router as activity_router
+from class_routes import router as class_router, invalidate_class
+from query_tracker import QueryTrackingMiddleware, instrument_engine, query_budget
+from clients import openai_enabled, get_openai_client, verify_google_id_token, close_clients
+from warmup import start_warmup, is_ready, readiness_report
+from read_replica import ReadYourWritesMiddleware, get_read_db
+from rate_limit import login_limiter, client_ip
+from refresh_tokens import issue_refresh_token, rotate_refresh_token, revoke_family, token_digest
+from user_purge import start_purger, stop_purger, request_purge, remaining_rows
+from fast_json import FastJSONResponse, rows_to_dicts
+from metrics import MetricsMiddleware, observe_dependency, render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Schema changes are applied by `python migrate.py` at deploy time (see startup.sh);
+# the app itself does no DDL on startup.
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm DB pool, bcrypt, Google certs and external clients in the background;
+    # /health/ready reports 503 until this has finished
+    start_warmup()
+    # Removes soft-deleted users' data in the background (see user_purge.py)
+    start_purger()
+    yield
+    stop_purger()
+    close_clients()
+
 
-app = FastAPI(title="HugHigh Login API", version="1.0.0")
+app = FastAPI(title="HugHigh Login API", version="1.0.0", lifespan=lifespan)
 
 # Include routers
 app.include_router(questionnaire_router)
 app.include_router(monthly_result_router)
 app.include_router(talent_result_router)
+app.include_router(user_import_router)
+app.include_router(gratitude_router)
+app.include_router(activity_router)
+app.include_router(class_router)
 
 # CORS configuration
 FRONTEND_URL = os.getenv("FRONTEND_URL", "https://hughigh-app-frontend.azurewebsites.net")
@@ -45,18 +80,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "")
-
-
-def create_audit_log(db: Session, user_id: str, action: str, ip_address: str = None):
-    """Helper function to create audit log entries."""
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        ip_address=ip_address
-    )
-    db.add(audit_log)
-    db.commit()
+# Read-your-writes tracking for replica reads, per-request query counting /
+# Server-Timing, then latency metrics (outermost)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryTrackingMiddleware)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
 
 @app.get("/")
@@ -83,15 +115,26 @@ def login(
     """
     Email + Password login endpoint.
 
+    - Rejects throttled clients with 429 before any DB or bcrypt work (see rate_limit.py)
     - Verifies user credentials
     - Creates JWT access token
     - Logs the login action
     """
+    ip = client_ip(request)
+    retry_after = login_limiter.check(ip, login_data.email)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
     # Find user by email
     user = db.query(User).filter(User.email == login_data.email).first()
 
     if not user:
         # Log failed login attempt (without user_id since user not found)
+        login_limiter.record_failure(ip, login_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -100,7 +143,11 @@ def login(
     # Verify password
     if not user.hashed_password or not verify_password(login_data.password, user.hashed_password):
         # Log failed login
-        create_audit_log(db, user.id, "login_failed", request.client.host if request.client else None)
+        login_limiter.record_failure(ip, login_data.email)
+        create_audit_log(
+            db, user.id, "login_failed", request.client.host if request.client else None,
+            class_name=user.class_name
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -113,19 +160,27 @@ def login(
             detail="User account is inactive"
         )
 
+    login_limiter.record_success(ip, login_data.email)
+
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.id, "email": user.email, "role": user.role},
+        data=access_token_claims(user),
         expires_delta=access_token_expires
     )
 
-    # Log successful login
-    create_audit_log(db, user.id, "login", request.client.host if request.client else None)
+    refresh_token = issue_refresh_token(db, user)
+
+    # Log successful login (commits the refresh token too)
+    create_audit_log(
+        db, user.id, "login", request.client.host if request.client else None,
+        class_name=user.class_name
+    )
 
     return LoginResponse(
         access_token=access_token,
         token_type="bearer",
+        refresh_token=refresh_token,
         user=UserResponse(
             id=user.id,
             email=user.email,
@@ -154,11 +209,7 @@ def google_login(
     """
     try:
         # Verify the Google ID token
-        idinfo = id_token.verify_oauth2_token(
-            google_data.credential,
-            google_requests.Request(),
-            GOOGLE_CLIENT_ID
-        )
+        idinfo = verify_google_id_token(google_data.credential)
 
         # Extract Google user info
         google_sub = idinfo['sub']
@@ -167,7 +218,9 @@ def google_login(
         profile_picture = idinfo.get('picture', None)
 
         # Check if Google account already exists
-        google_account = db.query(UserGoogleAccount).filter(
+        google_account = db.query(UserGoogleAccount).options(
+            joinedload(UserGoogleAccount.user)
+        ).filter(
             UserGoogleAccount.google_sub == google_sub
         ).first()
 
@@ -213,16 +266,22 @@ def google_login(
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.id, "email": user.email, "role": user.role},
+            data=access_token_claims(user),
             expires_delta=access_token_expires
         )
 
-        # Log successful login
-        create_audit_log(db, user.id, "google_login", request.client.host if request.client else None)
+        refresh_token = issue_refresh_token(db, user)
+
+        # Log successful login (commits the refresh token too)
+        create_audit_log(
+            db, user.id, "google_login", request.client.host if request.client else None,
+            class_name=user.class_name
+        )
 
         return LoginResponse(
             access_token=access_token,
             token_type="bearer",
+            refresh_token=refresh_token,
             user=UserResponse(
                 id=user.id,
                 email=user.email,
@@ -247,26 +306,67 @@ def google_login(
         )
 
 
+@app.post("/auth/refresh", response_model=RefreshResponse)
+def refresh_access_token(
+    refresh_data: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Exchange a refresh token for a new access token.
+
+    - One indexed lookup; no password or Google verification
+    - The refresh token rotates: the response carries its successor
+    - Reusing a spent refresh token revokes the whole login session
+    """
+    user, refresh_token = rotate_refresh_token(db, refresh_data.refresh_token)
+
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data=access_token_claims(user),
+        expires_delta=access_token_expires
+    )
+    db.commit()
+
+    return RefreshResponse(
+        access_token=access_token,
+        token_type="bearer",
+        refresh_token=refresh_token
+    )
+
+
 @app.post("/auth/logout")
 def logout(
     request: Request,
+    logout_data: Optional[LogoutRequest] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Logout endpoint.
 
+    - Revokes the refresh token (and its rotation chain) if one is sent
     - Logs the logout action
-    - In JWT implementation, actual token invalidation happens client-side
+    - In JWT implementation, access token invalidation happens client-side
     """
+    if logout_data and logout_data.refresh_token:
+        family_id = db.query(RefreshToken.family_id).filter(
+            RefreshToken.token_hash == token_digest(logout_data.refresh_token),
+            RefreshToken.user_id == current_user.id
+        ).scalar()
+        if family_id:
+            revoke_family(db, family_id)
+
     # Log logout
-    create_audit_log(db, current_user.id, "logout", request.client.host if request.client else None)
+    create_audit_log(
+        db, current_user.id, "logout", request.client.host if request.client else None,
+        class_name=current_user.class_name
+    )
 
     return {"message": "Successfully logged out"}
 
 
 @app.get("/auth/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(current_user: User = Depends(get_current_db_user)):
     """
     Get current authenticated user information.
 
@@ -289,7 +389,7 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
 @app.put("/profile", response_model=UserResponse)
 def update_profile(
     profile_data: ProfileUpdateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_db_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -352,6 +452,11 @@ def create_user_with_email(
 
     # Check if user already exists
     existing_user = db.query(User).filter(User.email == user_data.email).first()
+    if existing_user and existing_user.deleted_at is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A deleted user with this email is still being purged; try again later"
+        )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -423,6 +528,11 @@ def create_user_with_google(
 
     # Check if user already exists
     existing_user = db.query(User).filter(User.email == user_data.email).first()
+    if existing_user and existing_user.deleted_at is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A deleted user with this email is still being purged; try again later"
+        )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -471,15 +581,16 @@ def create_user_with_google(
 
 
 @app.get("/admin/users", response_model=list[UserResponse])
+@query_budget(2)
 def get_all_users(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Admin-only endpoint to list all users.
 
     - Only Admin (role=2) can access this endpoint
-    - Returns all users in the system
+    - Returns all users in the system, except deleted ones
     """
     # Check if current user is admin
     if current_user.role != 2:
@@ -488,19 +599,12 @@ def get_all_users(
             detail="Only administrators can view users"
         )
 
-    users = db.query(User).all()
-    return [
-        UserResponse(
-            id=user.id,
-            email=user.email,
-            name=user.name,
-            class_name=user.class_name,
-            role=user.role,
-            is_active=user.is_active,
-            created_at=user.created_at
-        )
-        for user in users
-    ]
+    # Column rows serialized straight to JSON (no per-row models, no re-validation)
+    users = db.query(
+        User.email, User.role, User.id, User.name, User.class_name,
+        User.is_active, User.created_at
+    ).filter(User.deleted_at.is_(None)).all()
+    return FastJSONResponse(rows_to_dicts(users, profile_image=None, hobbies=None, current_focus=None))
 
 
 @app.get("/admin/users/{user_id}", response_model=UserResponse)
@@ -522,7 +626,7 @@ def get_user_by_id(
             detail="Only administrators can view user details"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).filter(User.id == user_id, User.deleted_at.is_(None)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -570,7 +674,7 @@ def update_user(
             detail="Cannot update your own account this way"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).filter(User.id == user_id, User.deleted_at.is_(None)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -578,6 +682,7 @@ def update_user(
         )
 
     # Update fields
+    authorization = (user.role, user.class_name, user.is_active)
     if user_data.name is not None:
         user.name = user_data.name
     if user_data.role is not None:
@@ -592,8 +697,18 @@ def update_user(
     if user_data.is_active is not None:
         user.is_active = user_data.is_active
 
+    # Tokens carry role and class; changing them (or deactivating) invalidates the tokens
+    changed = (user.role, user.class_name, user.is_active) != authorization
+    if changed:
+        bump_token_version(user)
+
     db.commit()
     db.refresh(user)
+    if changed:
+        publish_token_version(user)
+        # The student may have moved class or left the overview counts
+        invalidate_class(authorization[1])
+        invalidate_class(user.class_name)
 
     # Log the action
     create_audit_log(
@@ -626,7 +741,8 @@ def delete_user(
 
     - Only Admin (role=2) can access this endpoint
     - Cannot delete the admin themselves
-    - Deletes user and associated records
+    - Marks the user inactive and deleted at once; the user's records are
+      purged in the background (see GET /admin/users/{user_id}/deletion)
     - Logs the action in audit log
     """
     # Check if current user is admin
@@ -643,7 +759,7 @@ def delete_user(
             detail="Cannot delete your own account"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).filter(User.id == user_id, User.deleted_at.is_(None)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -652,15 +768,13 @@ def delete_user(
 
     user_email = user.email
 
-    # Delete associated Google accounts
-    db.query(UserGoogleAccount).filter(UserGoogleAccount.user_id == user_id).delete()
-
-    # Delete associated audit logs
-    db.query(AuditLog).filter(AuditLog.user_id == user_id).delete()
-
-    # Delete user
-    db.delete(user)
+    # Soft delete: login and token checks reject inactive users from now on
+    user.is_active = False
+    user.deleted_at = datetime.utcnow()
+    bump_token_version(user)
     db.commit()
+    publish_token_version(user)
+    invalidate_class(user.class_name)
 
     # Log the action
     create_audit_log(
@@ -670,15 +784,86 @@ def delete_user(
         request.client.host if request.client else None
     )
 
+    request_purge()
+
     return {"message": f"User {user_email} deleted successfully"}
 
 
+@app.get("/admin/users/{user_id}/deletion", response_model=UserDeletionResponse)
+def get_user_deletion_progress(
+    user_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Admin-only endpoint to follow the background purge of a deleted user.
+
+    - Only Admin (role=2) can access this endpoint
+    - Returns the rows still to be removed per table
+    - 404 once the user row itself is gone (purge finished) or if the user
+      was never deleted
+    """
+    # Check if current user is admin
+    if current_user.role != 2:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can view user deletions"
+        )
+
+    deleted_at = db.query(User.deleted_at).filter(
+        User.id == user_id, User.deleted_at.isnot(None)
+    ).scalar()
+    if deleted_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deleted user not found"
+        )
+
+    remaining = remaining_rows(db, user_id)
+    return UserDeletionResponse(
+        user_id=user_id,
+        deleted_at=deleted_at,
+        remaining=remaining,
+        remaining_total=sum(remaining.values())
+    )
+
+
 @app.get("/health")
 def health_check():
-    """Health check endpoint."""
+    """Health check endpoint (liveness)."""
     return {"status": "healthy"}
 
 
+@app.get("/health/ready")
+def readiness_check():
+    """
+    Readiness endpoint.
+
+    - Returns 503 until the startup warm-up has finished
+    - Use this path for the load balancer / App Service health check
+    """
+    report = readiness_report()
+    if not is_ready():
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=report)
+    return report
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """
+    Prometheus metrics endpoint.
+
+    - Per-route latency histograms, in-flight requests, DB/OpenAI/Google time
+    - Requires `Authorization: Bearer <METRICS_TOKEN>` when METRICS_TOKEN is set
+    """
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token"
+        )
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 # Student Schema
 from pydantic import BaseModel
 
@@ -690,9 +875,10 @@ class StudentResponse(BaseModel):
 
 
 @app.get("/students", response_model=list[StudentResponse])
+@query_budget(2)
 def get_students(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all students for team member selection.
@@ -701,38 +887,27 @@ def get_students(
     - Excludes the current user from the list
     """
     # Get all students (role=0), excluding current user
-    students = db.query(User).filter(
+    students = db.query(User.id, User.name, User.email, User.class_name).filter(
         User.role == 0,  # Students only
         User.id != current_user.id,
         User.is_active == True
     ).all()
 
-    return [
-        StudentResponse(
-            id=user.id,
-            name=user.name or user.email,
-            email=user.email,
-            class_name=user.class_name
-        )
+    return FastJSONResponse([
+        {
+            "id": user.id,
+            "name": user.name or user.email,
+            "email": user.email,
+            "class_name": user.class_name
+        }
         for user in students
-    ]
+    ])
 
 
 # OpenAI Evaluation for "謙虚である力"
 from typing import Optional
 
-# Optional OpenAI import - works without it installed
-try:
-    from openai import OpenAI
-    import httpx
-    _http_client = httpx.Client(proxy=None)
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OpenAI = None
-    _http_client = None
-    OPENAI_AVAILABLE = False
-
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# The OpenAI SDK is optional and loaded lazily (see clients.py)
 
 class GratitudeTargetInput(BaseModel):
     student_name: str
@@ -755,12 +930,12 @@ def evaluate_content_with_ai(content: str, content_type: str, max_score: int) ->
     if not content or not content.strip():
         return 0
 
-    if not OPENAI_AVAILABLE or not OPENAI_API_KEY:
+    if not openai_enabled():
         # Fallback if OpenAI not available or no API key - give partial score
         return max_score // 2
 
     try:
-        client = OpenAI(api_key=OPENAI_API_KEY, http_client=_http_client)
+        client = get_openai_client()
 
         if content_type == "gratitude":
             prompt = f"""以下の感謝メッセージの具体性を評価してください。
@@ -797,15 +972,16 @@ def evaluate_content_with_ai(content: str, content_type: str, max_score: int) ->
 
 数値のみ回答:"""
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "あなたは教育評価の専門家です。指示に従って評価点数のみを返してください。"},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=10,
-            temperature=0.3
-        )
+        with observe_dependency("openai"):
+            response = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "あなたは教育評価の専門家です。指示に従って評価点数のみを返してください。"},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=10,
+                temperature=0.3
+            )
 
         result = response.choices[0].message.content.strip()
         # Extract number from response
@@ -904,7 +1080,7 @@ def generate_skill_advice(
     """
     Generate personalized advice for each skill based on the score using AI.
     """
-    if not OPENAI_AVAILABLE or not OPENAI_API_KEY:
+    if not openai_enabled():
         # Fallback to static advice if OpenAI not available or no API key
         return SkillAdviceResponse(advice={
             skill: get_fallback_advice(skill, score)
@@ -912,7 +1088,7 @@ def generate_skill_advice(
         })
 
     try:
-        client = OpenAI(api_key=OPENAI_API_KEY, http_client=_http_client)
+        client = get_openai_client()
 
         # Build prompt with all skills
         skills_text = "\n".join([f"- {skill}: {score}点" for skill, score in request.skills.items()])
@@ -945,15 +1121,16 @@ JSON形式で出力してください：
 {{"戦略的計画力": "アドバイス...", "課題設定・構想力": "アドバイス...", ...}}
 """
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "あなたは高校生を支援する教育コーチです。JSON形式で回答してください。"},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.7
-        )
+        with observe_dependency("openai"):
+            response = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "あなたは高校生を支援する教育コーチです。JSON形式で回答してください。"},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=1000,
+                temperature=0.7
+            )
 
         result = response.choices[0].message.content.strip()
 
@@ -0,0 +1,220 @@
+"""
+Versioned schema migration runner (MySQL and SQLite).
+
+Migrations live in `migrations/NNNN_description.py` and define
+`upgrade(conn)`. Applied versions are recorded in `schema_migrations`, so
+each one runs exactly once per database. Run it once per deploy, before
+the app workers start (see startup.sh) - the app itself does no DDL:
+
+    python migrate.py            # apply pending migrations
+    python migrate.py status     # list applied / pending versions
+
+Helpers below keep migrations online where the dialect allows it:
+MySQL index builds use ALGORITHM=INPLACE, LOCK=NONE, and `backfill`
+updates large tables in primary-key ordered chunks with a commit (and an
+optional pause) per chunk instead of one long-running UPDATE.
+"""
+
+import importlib.util
+import os
+import sys
+import io
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import text, inspect
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+LOCK_NAME = "hughigh_schema_migrations"
+
+
+# ---------------------------------------------------------------------------
+# Helpers for migration scripts
+# ---------------------------------------------------------------------------
+
+def has_table(conn, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def has_column(conn, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def has_index(conn, table: str, index: str) -> bool:
+    return index in {i["name"] for i in inspect(conn).get_indexes(table)}
+
+
+def add_column(conn, table: str, column: str, ddl: str):
+    """Add a column if it does not exist yet (`ddl` is the type and options)."""
+    if has_column(conn, table, column):
+        return
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    conn.commit()
+
+
+def drop_column(conn, table: str, column: str):
+    """Drop a column if it exists (drop its indexes first; SQLite needs 3.35+)."""
+    if not has_column(conn, table, column):
+        return
+    conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+    conn.commit()
+
+
+def create_index(conn, table: str, index: str, columns: list[str], unique: bool = False):
+    """Create an index if missing, without blocking writes on MySQL."""
+    if has_index(conn, table, index):
+        return
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    online = " ALGORITHM=INPLACE LOCK=NONE" if conn.dialect.name == "mysql" else ""
+    conn.execute(text(f"CREATE {kind} {index} ON {table} ({', '.join(columns)}){online}"))
+    conn.commit()
+
+
+def drop_index(conn, table: str, index: str):
+    if not has_index(conn, table, index):
+        return
+    if conn.dialect.name == "mysql":
+        conn.execute(text(f"DROP INDEX {index} ON {table}"))
+    else:
+        conn.execute(text(f"DROP INDEX {index}"))
+    conn.commit()
+
+
+def backfill(conn, table: str, columns: list[str], apply, key: str = "id",
+             where: str = "", chunk_size: int = None, pause: float = None) -> int:
+    """
+    Walk `table` in `key` order, `chunk_size` rows at a time.
+
+    `apply(conn, rows)` performs the updates for one chunk; each chunk is
+    committed on its own so locks stay short. Returns the rows visited.
+    """
+    chunk_size = chunk_size or int(os.getenv("MIGRATION_CHUNK_SIZE", "1000"))
+    pause = float(os.getenv("MIGRATION_CHUNK_PAUSE", "0")) if pause is None else pause
+    select_cols = ", ".join([key] + [c for c in columns if c != key])
+    condition = f" AND ({where})" if where else ""
+
+    visited = 0
+    last_key = None
+    while True:
+        if last_key is None:
+            sql = f"SELECT {select_cols} FROM {table} WHERE 1=1{condition} ORDER BY {key} LIMIT :limit"
+            params = {"limit": chunk_size}
+        else:
+            sql = f"SELECT {select_cols} FROM {table} WHERE {key} > :last{condition} ORDER BY {key} LIMIT :limit"
+            params = {"limit": chunk_size, "last": last_key}
+        rows = conn.execute(text(sql), params).mappings().all()
+        if not rows:
+            break
+
+        apply(conn, rows)
+        conn.commit()
+
+        visited += len(rows)
+        last_key = rows[-1][key]
+        if pause:
+            time.sleep(pause)
+
+    return visited
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def discover() -> list[tuple[str, str, Path]]:
+    """Return (version, description, path) for every migration file, in order."""
+    found = []
+    for path in sorted(MIGRATIONS_DIR.glob("[0-9][0-9][0-9][0-9]_*.py")):
+        version, _, name = path.stem.partition("_")
+        found.append((version, name.replace("_", " "), path))
+    return found
+
+
+def _load(path: Path):
+    spec = importlib.util.spec_from_file_location(f"migration_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _ensure_version_table(conn):
+    if not has_table(conn, "schema_migrations"):
+        conn.execute(text(
+            "CREATE TABLE schema_migrations ("
+            " version VARCHAR(32) NOT NULL PRIMARY KEY,"
+            " description VARCHAR(255) NOT NULL,"
+            " applied_at DATETIME NOT NULL)"
+        ))
+        conn.commit()
+
+
+def applied_versions(conn) -> set[str]:
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def upgrade(engine=None, verbose: bool = True) -> list[str]:
+    """Apply all pending migrations. Safe to call concurrently from several instances."""
+    if engine is None:
+        from database import engine
+
+    applied = []
+    with engine.connect() as conn:
+        if conn.dialect.name == "mysql":
+            got_lock = conn.execute(text("SELECT GET_LOCK(:name, 600)"), {"name": LOCK_NAME}).scalar()
+            if got_lock != 1:
+                raise RuntimeError("Could not acquire the schema migration lock")
+        try:
+            done = applied_versions(conn)
+            conn.commit()
+            for version, description, path in discover():
+                if version in done:
+                    continue
+                if verbose:
+                    print(f"Applying {version} {description}...")
+                started = time.perf_counter()
+                _load(path).upgrade(conn)
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, description, applied_at) "
+                         "VALUES (:version, :description, :applied_at)"),
+                    {"version": version, "description": description, "applied_at": datetime.utcnow()}
+                )
+                conn.commit()
+                applied.append(version)
+                if verbose:
+                    print(f"  Done in {time.perf_counter() - started:.2f}s")
+        finally:
+            if conn.dialect.name == "mysql":
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+                conn.commit()
+
+    if verbose:
+        print("Database is up to date." if not applied else f"Applied {len(applied)} migration(s).")
+    return applied
+
+
+def status(engine=None):
+    if engine is None:
+        from database import engine
+
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+        conn.commit()
+    for version, description, _ in discover():
+        print(f"  [{'x' if version in done else ' '}] {version} {description}")
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "upgrade":
+        upgrade()
+    elif command == "status":
+        status()
+    else:
+        print("Usage: python migrate.py [upgrade|status]")
+        sys.exit(2)
@@ -0,0 +1,93 @@
+"""
+Initial schema: users, Google accounts, audit logs, questionnaires,
+monthly and talent results.
+
+Tables that already exist (databases created by the old import-time
+create_all) are left as they are.
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, String, Integer, Boolean, DateTime, ForeignKey, JSON, Text
+)
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("email", String(255), unique=True, index=True, nullable=False),
+    Column("hashed_password", String(255), nullable=True),
+    Column("name", String(255), nullable=True),
+    Column("class_name", String(255), nullable=True),
+    Column("role", Integer, nullable=False),
+    Column("is_active", Boolean, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Column("profile_image", Text, nullable=True),
+    Column("hobbies", String(50), nullable=True),
+    Column("current_focus", JSON, nullable=True),
+)
+
+Table(
+    "user_google_accounts", metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("user_id", String(36), ForeignKey("users.id"), unique=True, nullable=False),
+    Column("google_sub", String(255), unique=True, nullable=False, index=True),
+    Column("google_email", String(255), nullable=False),
+    Column("profile_picture_url", String(1024), nullable=True),
+    Column("linked_at", DateTime, nullable=False),
+)
+
+Table(
+    "audit_logs", metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("user_id", String(36), ForeignKey("users.id"), nullable=False),
+    Column("action", String(255), nullable=False),
+    Column("ip_address", String(64), nullable=True),
+    Column("timestamp", DateTime, nullable=False),
+)
+
+Table(
+    "questionnaires", metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("user_id", String(36), ForeignKey("users.id"), nullable=False),
+    Column("week", Integer, nullable=False),
+    Column("title", String(255), nullable=False),
+    Column("deadline", DateTime, nullable=False),
+    Column("status", String(32), nullable=False),
+    Column("answers", JSON, nullable=True),
+    Column("submitted_at", DateTime, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+Table(
+    "monthly_results", metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("user_id", String(36), ForeignKey("users.id"), nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("month", Integer, nullable=False),
+    Column("level", Integer, nullable=False),
+    Column("skills", JSON, nullable=False),
+    Column("ai_comment", Text, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+Table(
+    "talent_results", metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("user_id", String(36), ForeignKey("users.id"), unique=True, nullable=False),
+    Column("talent_type", String(255), nullable=False),
+    Column("talent_name", String(255), nullable=False),
+    Column("description", Text, nullable=False),
+    Column("keywords", JSON, nullable=False),
+    Column("strengths", JSON, nullable=False),
+    Column("next_steps", JSON, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    conn.commit()
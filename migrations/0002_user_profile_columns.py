@@ -0,0 +1,10 @@
+"""
+Profile columns on users (replaces the old SQLite-only add_profile_columns.py).
+"""
+from migrate import add_column
+
+
+def upgrade(conn):
+    add_column(conn, "users", "profile_image", "TEXT")
+    add_column(conn, "users", "hobbies", "VARCHAR(50)")
+    add_column(conn, "users", "current_focus", "JSON")
@@ -0,0 +1,23 @@
+"""
+One questionnaire per student per week: unique index on (user_id, week).
+
+The scheduler (questionnaire_scheduler.py) relies on it to make issuing a
+week idempotent. Existing duplicates must be resolved by hand first - the
+migration refuses to delete answers on its own.
+"""
+from sqlalchemy import text
+
+from migrate import create_index
+
+
+def upgrade(conn):
+    duplicates = conn.execute(text(
+        "SELECT COUNT(*) FROM (SELECT user_id, week FROM questionnaires"
+        " GROUP BY user_id, week HAVING COUNT(*) > 1) d"
+    )).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} (user_id, week) pairs have more than one questionnaire; "
+            "remove the duplicates before applying this migration"
+        )
+    create_index(conn, "questionnaires", "uq_questionnaires_user_week", ["user_id", "week"], unique=True)
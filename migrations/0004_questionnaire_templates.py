@@ -0,0 +1,83 @@
+"""
+Move week, title and deadline out of the per-student questionnaire rows
+into questionnaire_templates (one row per week).
+
+Questionnaires get template_id, backfilled in chunks; the unique key
+moves from (user_id, week) to (user_id, template_id) and the old columns
+are dropped. Where students of the same week had different deadlines the
+template keeps the latest one (and the first title).
+
+template_id stays nullable at the database level on SQLite, which cannot
+add NOT NULL to an existing column; the model and MySQL enforce it.
+"""
+import uuid
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, Column, String, Integer, DateTime, text, select, func, table, column
+
+from migrate import has_table, has_column, add_column, create_index, drop_index, drop_column, backfill
+
+metadata = MetaData()
+
+questionnaire_templates = Table(
+    "questionnaire_templates", metadata,
+    Column("id", String(36), primary_key=True, index=True),
+    Column("week", Integer, unique=True, nullable=False),
+    Column("title", String(255), nullable=False),
+    Column("deadline", DateTime, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+# The old per-row columns, typed so deadlines come back as datetimes on SQLite too
+old_questionnaires = table(
+    "questionnaires",
+    column("week", Integer),
+    column("title", String),
+    column("deadline", DateTime),
+)
+
+
+def upgrade(conn):
+    if not has_table(conn, "questionnaire_templates"):
+        questionnaire_templates.create(conn)
+        conn.commit()
+    add_column(conn, "questionnaires", "template_id", "VARCHAR(36) NULL")
+
+    if has_column(conn, "questionnaires", "week"):
+        # One template per week seen in the existing rows
+        existing = {row[0] for row in conn.execute(text("SELECT week FROM questionnaire_templates"))}
+        now = datetime.utcnow()
+        q = old_questionnaires.c
+        weeks = conn.execute(
+            select(q.week, func.min(q.title), func.max(q.deadline)).group_by(q.week)
+        ).all()
+        new_templates = [
+            {"id": str(uuid.uuid4()), "week": week, "title": title, "deadline": deadline,
+             "created_at": now, "updated_at": now}
+            for week, title, deadline in weeks if week not in existing
+        ]
+        if new_templates:
+            conn.execute(questionnaire_templates.insert(), new_templates)
+            conn.commit()
+
+        template_ids = dict(conn.execute(text("SELECT week, id FROM questionnaire_templates")).all())
+
+        def apply(conn, rows):
+            conn.execute(
+                text("UPDATE questionnaires SET template_id = :template_id WHERE id = :id"),
+                [{"template_id": template_ids[row["week"]], "id": row["id"]} for row in rows]
+            )
+
+        backfill(conn, "questionnaires", ["week"], apply, where="template_id IS NULL")
+
+    create_index(conn, "questionnaires", "uq_questionnaires_user_template", ["user_id", "template_id"], unique=True)
+    create_index(conn, "questionnaires", "ix_questionnaires_template_id", ["template_id"])
+    drop_index(conn, "questionnaires", "uq_questionnaires_user_week")
+
+    if conn.dialect.name == "mysql":
+        conn.execute(text("ALTER TABLE questionnaires MODIFY template_id VARCHAR(36) NOT NULL"))
+        conn.commit()
+
+    for column in ("week", "title", "deadline"):
+        drop_column(conn, "questionnaires", column)
@@ -0,0 +1,10 @@
+"""
+Indexes for the incremental Parquet export (export_monthly_results.py):
+changed rows are found by updated_at, partitions are rebuilt by (year, month).
+"""
+from migrate import create_index
+
+
+def upgrade(conn):
+    create_index(conn, "monthly_results", "ix_monthly_results_updated_at", ["updated_at"])
+    create_index(conn, "monthly_results", "ix_monthly_results_year_month", ["year", "month"])
@@ -0,0 +1,50 @@
+"""
+Typed scoring columns on questionnaires (q1, q2_has_gratitude, q3_did_conduct,
+q3_could_extract, q3_did_receive, q3_could_speak), backfilled in chunks from
+the answers JSON, so score and class statistics can be SQL aggregates.
+"""
+import json
+
+from sqlalchemy import text
+
+from migrate import add_column, create_index, backfill
+
+# answers key -> column (frozen copy of models.ANSWER_COLUMNS)
+ANSWER_COLUMNS = {
+    "q1": "q1",
+    "q2_hasGratitude": "q2_has_gratitude",
+    "q3_didConduct": "q3_did_conduct",
+    "q3_couldExtract": "q3_could_extract",
+    "q3_didReceive": "q3_did_receive",
+    "q3_couldSpeak": "q3_could_speak",
+}
+
+
+def upgrade(conn):
+    add_column(conn, "questionnaires", "q1", "INTEGER NULL")
+    for column in list(ANSWER_COLUMNS.values())[1:]:
+        add_column(conn, "questionnaires", column, "BOOLEAN NULL")
+
+    assignments = ", ".join(f"{column} = :{column}" for column in ANSWER_COLUMNS.values())
+    update = text(f"UPDATE questionnaires SET {assignments} WHERE id = :id")
+
+    def apply(conn, rows):
+        params = []
+        for row in rows:
+            answers = row["answers"]
+            if isinstance(answers, (str, bytes)):
+                answers = json.loads(answers)
+            answers = answers or {}
+            values = {column: answers.get(key) for key, column in ANSWER_COLUMNS.items()}
+            if values["q1"] is not None:
+                values["q1"] = int(values["q1"])
+            for column in list(ANSWER_COLUMNS.values())[1:]:
+                if values[column] is not None:
+                    values[column] = bool(values[column])
+            values["id"] = row["id"]
+            params.append(values)
+        conn.execute(update, params)
+
+    backfill(conn, "questionnaires", ["answers"], apply, where="answers IS NOT NULL")
+
+    create_index(conn, "questionnaires", "ix_questionnaires_user_status", ["user_id", "status"])
@@ -0,0 +1,99 @@
+"""
+gratitude_edges: one row per "thank you" in a questionnaire's q2 answer,
+indexed from both sides, backfilled in chunks from the answers JSON.
+
+Only targets that exist as users are kept (early seed data used
+placeholder ids), and self-thanks are skipped, as on submit.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, Column, String, Integer, DateTime, Text, ForeignKey, text, bindparam
+
+from migrate import has_table, create_index, backfill
+
+metadata = MetaData()
+
+Table("users", metadata, Column("id", String(36), primary_key=True))
+Table("questionnaires", metadata, Column("id", String(36), primary_key=True))
+
+gratitude_edges = Table(
+    "gratitude_edges", metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("questionnaire_id", String(36), ForeignKey("questionnaires.id"), nullable=False, index=True),
+    Column("from_user_id", String(36), ForeignKey("users.id"), nullable=False),
+    Column("to_user_id", String(36), ForeignKey("users.id"), nullable=False),
+    Column("week", Integer, nullable=False),
+    Column("message", Text, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+def _targets(answers) -> list[tuple[str, str]]:
+    """Frozen copy of gratitude_routes.gratitude_targets."""
+    if isinstance(answers, (str, bytes)):
+        answers = json.loads(answers)
+    answers = answers or {}
+    if not answers.get("q2_hasGratitude"):
+        return []
+    targets = [(t.get("studentId"), t.get("message")) for t in answers.get("q2_gratitudeTargets") or []]
+    if not targets and answers.get("q2_targetStudentId"):
+        targets = [(answers["q2_targetStudentId"], answers.get("q2_message"))]
+    return [(student_id, message or None) for student_id, message in targets if student_id]
+
+
+def _as_datetime(value):
+    # Raw SELECTs return DATETIME as text on SQLite
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def upgrade(conn):
+    if not has_table(conn, "gratitude_edges"):
+        gratitude_edges.create(conn)
+        conn.commit()
+    create_index(conn, "gratitude_edges", "ix_gratitude_edges_to_user", ["to_user_id", "id"])
+    create_index(conn, "gratitude_edges", "ix_gratitude_edges_from_user", ["from_user_id", "id"])
+
+    weeks = dict(conn.execute(text("SELECT id, week FROM questionnaire_templates")).all())
+    existing_users = text("SELECT id FROM users WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+    clear = text("DELETE FROM gratitude_edges WHERE questionnaire_id IN :ids").bindparams(
+        bindparam("ids", expanding=True)
+    )
+
+    def apply(conn, rows):
+        pending = []
+        for row in rows:
+            for to_user_id, message in _targets(row["answers"]):
+                pending.append((row, to_user_id, message))
+        if not pending:
+            return
+
+        # Re-runnable: drop edges already written for this chunk
+        conn.execute(clear, {"ids": [row["id"] for row in rows]})
+        users = {r[0] for r in conn.execute(existing_users, {"ids": list({t for _, t, _ in pending})})}
+
+        now = datetime.utcnow()
+        edges = []
+        seen = set()
+        for row, to_user_id, message in pending:
+            key = (row["id"], to_user_id)
+            if to_user_id not in users or to_user_id == row["user_id"] or key in seen:
+                continue
+            seen.add(key)
+            edges.append({
+                "questionnaire_id": row["id"],
+                "from_user_id": row["user_id"],
+                "to_user_id": to_user_id,
+                "week": weeks[row["template_id"]],
+                "message": message,
+                "created_at": _as_datetime(row["submitted_at"]) or now,
+            })
+        if edges:
+            conn.execute(gratitude_edges.insert(), edges)
+
+    backfill(
+        conn, "questionnaires", ["user_id", "template_id", "answers", "submitted_at"], apply,
+        where="answers IS NOT NULL AND status = 'completed'"
+    )
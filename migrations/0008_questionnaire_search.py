@@ -0,0 +1,89 @@
+"""
+Full-text search over questionnaire free-text answers (see search_index.py).
+
+questionnaire_search holds the joined text per questionnaire. On SQLite an
+external-content FTS5 table with the trigram tokenizer shadows it through
+triggers; on MySQL a FULLTEXT index uses the ngram parser. Completed
+questionnaires are backfilled in chunks.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, Column, String, Integer, DateTime, Text, ForeignKey, text, bindparam
+
+from migrate import has_table, has_index, backfill
+
+metadata = MetaData()
+
+Table("questionnaires", metadata, Column("id", String(36), primary_key=True))
+
+questionnaire_search = Table(
+    "questionnaire_search", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("questionnaire_id", String(36), ForeignKey("questionnaires.id"), unique=True, nullable=False),
+    Column("content", Text, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS questionnaire_search_fts USING fts5("
+    "content, content='questionnaire_search', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS questionnaire_search_ai AFTER INSERT ON questionnaire_search BEGIN "
+    "INSERT INTO questionnaire_search_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS questionnaire_search_ad AFTER DELETE ON questionnaire_search BEGIN "
+    "INSERT INTO questionnaire_search_fts(questionnaire_search_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS questionnaire_search_au AFTER UPDATE ON questionnaire_search BEGIN "
+    "INSERT INTO questionnaire_search_fts(questionnaire_search_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); "
+    "INSERT INTO questionnaire_search_fts(rowid, content) VALUES (new.id, new.content); END",
+]
+
+# Frozen copy of search_index.SEARCH_FIELDS / build_content
+SEARCH_FIELDS = [
+    "q3_conductContent", "q3_extractedInsight", "q3_extractionChallenge",
+    "q3_receiveContent", "q3_speakingInsight", "q3_speakingChallenge",
+]
+
+
+def _content(answers) -> str:
+    if isinstance(answers, (str, bytes)):
+        answers = json.loads(answers)
+    answers = answers or {}
+    parts = [answers.get(field) for field in SEARCH_FIELDS]
+    parts += [target.get("message") for target in answers.get("q2_gratitudeTargets") or []]
+    if not answers.get("q2_gratitudeTargets"):
+        parts.append(answers.get("q2_message"))
+    return "\n".join(part.strip() for part in parts if isinstance(part, str) and part.strip())
+
+
+def upgrade(conn):
+    if not has_table(conn, "questionnaire_search"):
+        questionnaire_search.create(conn)
+        conn.commit()
+
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_FTS:
+            conn.execute(text(statement))
+        conn.commit()
+    elif conn.dialect.name == "mysql" and not has_index(conn, "questionnaire_search", "ft_questionnaire_search_content"):
+        conn.execute(text(
+            "CREATE FULLTEXT INDEX ft_questionnaire_search_content "
+            "ON questionnaire_search (content) WITH PARSER ngram"
+        ))
+        conn.commit()
+
+    clear = text("DELETE FROM questionnaire_search WHERE questionnaire_id IN :ids").bindparams(
+        bindparam("ids", expanding=True)
+    )
+
+    def apply(conn, rows):
+        # Re-runnable: replace rows already written for this chunk
+        conn.execute(clear, {"ids": [row["id"] for row in rows]})
+        now = datetime.utcnow()
+        conn.execute(questionnaire_search.insert(), [
+            {"questionnaire_id": row["id"], "content": _content(row["answers"]), "updated_at": now}
+            for row in rows
+        ])
+
+    backfill(conn, "questionnaires", ["answers"], apply, where="answers IS NOT NULL AND status = 'completed'")
@@ -0,0 +1,10 @@
+"""
+users.deleted_at: user deletion only marks the user, and user_purge.py
+removes the user's rows in chunks afterwards.
+"""
+from migrate import add_column, create_index
+
+
+def upgrade(conn):
+    add_column(conn, "users", "deleted_at", "DATETIME NULL")
+    create_index(conn, "users", "ix_users_deleted_at", ["deleted_at"])
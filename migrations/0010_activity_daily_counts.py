@@ -0,0 +1,68 @@
+"""
+activity_daily_counts: audit events per day, action (without its ":detail"
+suffix) and class, incremented by create_audit_log from now on.
+
+Existing audit_logs are counted in chunks and the table is rebuilt from
+them, so re-running gives the same result. The class is the user's
+current class.
+"""
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import MetaData, Table, Column, String, Integer, Date, text
+
+from migrate import has_table, create_index, backfill
+
+metadata = MetaData()
+
+activity_daily_counts = Table(
+    "activity_daily_counts", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("day", Date, nullable=False),
+    Column("action", String(64), nullable=False),
+    Column("class_name", String(64), nullable=False),
+    Column("count", Integer, nullable=False),
+)
+
+# Frozen copy of audit.activity_day / activity_action
+ACTIVITY_UTC_OFFSET_HOURS = float(os.getenv("ACTIVITY_UTC_OFFSET_HOURS", "0"))
+
+
+def _day(timestamp):
+    # Raw SELECTs return DATETIME as text on SQLite
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return (timestamp + timedelta(hours=ACTIVITY_UTC_OFFSET_HOURS)).date()
+
+
+def upgrade(conn):
+    if not has_table(conn, "activity_daily_counts"):
+        activity_daily_counts.create(conn)
+        conn.commit()
+    create_index(
+        conn, "activity_daily_counts", "uq_activity_daily_counts_day_action_class",
+        ["day", "action", "class_name"], unique=True
+    )
+
+    classes = {
+        user_id: (class_name or "")[:64]  # users.class_name is wider than the rollup column
+        for user_id, class_name in conn.execute(text("SELECT id, class_name FROM users"))
+    }
+    counts = Counter()
+
+    def apply(conn, rows):
+        for row in rows:
+            action = row["action"].split(":", 1)[0][:64]
+            counts[(_day(row["timestamp"]), action, classes.get(row["user_id"], ""))] += 1
+
+    backfill(conn, "audit_logs", ["user_id", "action", "timestamp"], apply)
+
+    conn.execute(activity_daily_counts.delete())
+    rows = [
+        {"day": day, "action": action, "class_name": class_name, "count": count}
+        for (day, action, class_name), count in counts.items()
+    ]
+    for start in range(0, len(rows), 1000):
+        conn.execute(activity_daily_counts.insert(), rows[start:start + 1000])
+    conn.commit()
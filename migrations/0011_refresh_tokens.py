@@ -0,0 +1,32 @@
+"""
+refresh_tokens: hashed, rotating refresh tokens for POST /auth/refresh.
+"""
+from sqlalchemy import MetaData, Table, Column, String, DateTime, ForeignKey
+
+from migrate import has_table, create_index
+
+metadata = MetaData()
+
+Table("users", metadata, Column("id", String(36), primary_key=True))
+
+refresh_tokens = Table(
+    "refresh_tokens", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("user_id", String(36), ForeignKey("users.id"), nullable=False),
+    Column("family_id", String(36), nullable=False),
+    Column("token_hash", String(64), nullable=False),
+    Column("expires_at", DateTime, nullable=False),
+    Column("used_at", DateTime, nullable=True),
+    Column("revoked_at", DateTime, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+def upgrade(conn):
+    if not has_table(conn, "refresh_tokens"):
+        refresh_tokens.create(conn)
+        conn.commit()
+    create_index(conn, "refresh_tokens", "ix_refresh_tokens_token_hash", ["token_hash"], unique=True)
+    create_index(conn, "refresh_tokens", "ix_refresh_tokens_user_id", ["user_id"])
+    create_index(conn, "refresh_tokens", "ix_refresh_tokens_family_id", ["family_id"])
+    create_index(conn, "refresh_tokens", "ix_refresh_tokens_expires_at", ["expires_at"])
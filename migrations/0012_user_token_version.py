@@ -0,0 +1,11 @@
+"""
+users.token_version: copied into access tokens as `ver` and bumped on role,
+class or active changes, so AUTH_STATELESS can reject superseded tokens.
+The updated_at index serves the incremental token_versions refresh.
+"""
+from migrate import add_column, create_index
+
+
+def upgrade(conn):
+    add_column(conn, "users", "token_version", "INTEGER NOT NULL DEFAULT 0")
+    create_index(conn, "users", "ix_users_updated_at", ["updated_at"])
@@ -0,0 +1,10 @@
+"""
+Indexes for the per-class views (class_routes.py): students of a class, and
+a student's monthly results by month.
+"""
+from migrate import create_index
+
+
+def upgrade(conn):
+    create_index(conn, "users", "ix_users_class_name", ["class_name"])
+    create_index(conn, "monthly_results", "ix_monthly_results_user_year_month", ["user_id", "year", "month"])
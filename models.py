@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Integer, Boolean, Date, DateTime, ForeignKey, JSON, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -11,11 +11,13 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=True)  # Nullable for Google-only users
     name = Column(String, nullable=True)  # User's full name
-    class_name = Column(String, nullable=True)  # Class name for students (e.g., "1-A")
+    class_name = Column(String, nullable=True, index=True)  # Class name for students (e.g., "1-A")
     role = Column(Integer, nullable=False)  # 0: Student, 1: Teacher, 2: Admin
     is_active = Column(Boolean, default=True, nullable=False)
+    deleted_at = Column(DateTime, nullable=True, index=True)  # Soft-deleted; purged by user_purge.py
+    token_version = Column(Integer, default=0, nullable=False)  # `ver` claim; bumped to invalidate access tokens
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
     # Profile fields
     profile_image = Column(Text, nullable=True)  # Base64 encoded image or URL
@@ -57,22 +59,153 @@ class AuditLog(Base):
     user = relationship("User", back_populates="audit_logs")
 
 
+class RefreshToken(Base):
+    """One issued refresh token (stored as a SHA-256 digest); rotation chains share a family_id."""
+    __tablename__ = "refresh_tokens"
+
+    id = Column(String(36), primary_key=True)  # UUID as string
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    family_id = Column(String(36), nullable=False, index=True)  # Login session the token descends from
+    token_hash = Column(String(64), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    used_at = Column(DateTime, nullable=True)  # Rotated: presenting it again is reuse
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    user = relationship("User")
+
+    # /auth/refresh looks tokens up by digest (see migrations/0011)
+    __table_args__ = (
+        Index("ix_refresh_tokens_token_hash", "token_hash", unique=True),
+    )
+
+
+class ActivityDailyCount(Base):
+    """Audit events per day, action and class, kept up to date by create_audit_log."""
+    __tablename__ = "activity_daily_counts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)
+    action = Column(String(64), nullable=False)  # Audit action without its ":detail" suffix
+    class_name = Column(String(64), nullable=False, default="")  # "" for users without a class
+    count = Column(Integer, nullable=False, default=0)
+
+    # Upsert key and the per-day range scans of GET /admin/activity (see migrations/0010)
+    __table_args__ = (
+        Index("uq_activity_daily_counts_day_action_class", "day", "action", "class_name", unique=True),
+    )
+
+
+class QuestionnaireTemplate(Base):
+    __tablename__ = "questionnaire_templates"
+
+    id = Column(String(36), primary_key=True, index=True)  # UUID as string
+    week = Column(Integer, unique=True, nullable=False)  # Week number
+    title = Column(String(255), nullable=False)
+    deadline = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Relationships
+    questionnaires = relationship("Questionnaire", back_populates="template")
+
+
+# Scoring-relevant answer fields mirrored into typed columns: answers key -> column
+ANSWER_COLUMNS = {
+    "q1": "q1",
+    "q2_hasGratitude": "q2_has_gratitude",
+    "q3_didConduct": "q3_did_conduct",
+    "q3_couldExtract": "q3_could_extract",
+    "q3_didReceive": "q3_did_receive",
+    "q3_couldSpeak": "q3_could_speak",
+}
+
+
 class Questionnaire(Base):
+    """A student's assignment of a QuestionnaireTemplate (week, title and deadline live there)."""
     __tablename__ = "questionnaires"
 
     id = Column(String(36), primary_key=True, index=True)  # UUID as string
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    week = Column(Integer, nullable=False)  # Week number
-    title = Column(String, nullable=False)
-    deadline = Column(DateTime, nullable=False)
+    template_id = Column(String(36), ForeignKey("questionnaire_templates.id"), nullable=False)
     status = Column(String, default="pending", nullable=False)  # "pending" or "completed"
     answers = Column(JSON, nullable=True)  # JSON field for answers
     submitted_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    # Typed copies of the scoring fields in `answers` (kept in sync by set_answers)
+    q1 = Column(Integer, nullable=True)  # 計画通りに行動できたか (1-5)
+    q2_has_gratitude = Column(Boolean, nullable=True)
+    q3_did_conduct = Column(Boolean, nullable=True)
+    q3_could_extract = Column(Boolean, nullable=True)
+    q3_did_receive = Column(Boolean, nullable=True)
+    q3_could_speak = Column(Boolean, nullable=True)
+
     # Relationships
     user = relationship("User", back_populates="questionnaires")
+    template = relationship("QuestionnaireTemplate", back_populates="questionnaires")
+
+    # One questionnaire per student per template (see migrations/0004)
+    __table_args__ = (
+        Index("uq_questionnaires_user_template", "user_id", "template_id", unique=True),
+        Index("ix_questionnaires_template_id", "template_id"),
+        Index("ix_questionnaires_user_status", "user_id", "status"),
+    )
+
+    def set_answers(self, answers: dict):
+        """Store the answers JSON and its typed scoring columns together."""
+        self.answers = answers
+        for key, column in ANSWER_COLUMNS.items():
+            setattr(self, column, (answers or {}).get(key))
+
+    # Shared metadata, read through the template (keeps QuestionnaireResponse unchanged)
+    @property
+    def week(self) -> int:
+        return self.template.week
+
+    @property
+    def title(self) -> str:
+        return self.template.title
+
+    @property
+    def deadline(self) -> datetime:
+        return self.template.deadline
+
+
+class QuestionnaireSearch(Base):
+    """Searchable free text of a questionnaire (see search_index.py for the n-gram indexes)."""
+    __tablename__ = "questionnaire_search"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)  # FTS5 rowid on SQLite
+    questionnaire_id = Column(String(36), ForeignKey("questionnaires.id"), unique=True, nullable=False)
+    content = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class GratitudeEdge(Base):
+    """One "thank you" from a questionnaire's q2 answer: from_user thanked to_user in `week`."""
+    __tablename__ = "gratitude_edges"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    questionnaire_id = Column(String(36), ForeignKey("questionnaires.id"), nullable=False, index=True)
+    from_user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    to_user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    week = Column(Integer, nullable=False)
+    message = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Both directions, newest first (see migrations/0007)
+    __table_args__ = (
+        Index("ix_gratitude_edges_to_user", "to_user_id", "id"),
+        Index("ix_gratitude_edges_from_user", "from_user_id", "id"),
+    )
+
+
+# Keys of MonthlyResult.skills (see monthly_result_routes.calculate_skills)
+SKILL_NAMES = (
+    "戦略的計画力", "課題設定・構想力", "巻き込む力", "対話する力", "実行する力", "完遂する力", "謙虚である力",
+)
 
 
 class MonthlyResult(Base):
@@ -91,6 +224,13 @@ class MonthlyResult(Base):
     # Relationships
     user = relationship("User", back_populates="monthly_results")
 
+    # Incremental export lookups (see migrations/0005), per-student months (0013)
+    __table_args__ = (
+        Index("ix_monthly_results_updated_at", "updated_at"),
+        Index("ix_monthly_results_year_month", "year", "month"),
+        Index("ix_monthly_results_user_year_month", "user_id", "year", "month"),
+    )
+
 
 class TalentResult(Base):
     __tablename__ = "talent_results"
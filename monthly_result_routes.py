@@ -5,16 +5,28 @@ from typing import Optional
 import uuid
 
 from database import get_db
+from read_replica import get_read_db
 from models import User, MonthlyResult, Questionnaire
 from schemas import MonthlyResultResponse
 from auth import get_current_user
+from query_tracker import query_budget
+from fast_json import FastJSONResponse, rows_to_dicts
+from questionnaire_stats import AnswerStats, answer_stats
+from class_routes import invalidate_class
 
 router = APIRouter(prefix="/monthly-results", tags=["monthly-results"])
 
+# Columns of MonthlyResultResponse, for the fast list path
+MONTHLY_RESULT_COLUMNS = (
+    MonthlyResult.id, MonthlyResult.user_id, MonthlyResult.year, MonthlyResult.month,
+    MonthlyResult.level, MonthlyResult.skills, MonthlyResult.ai_comment,
+    MonthlyResult.created_at, MonthlyResult.updated_at,
+)
 
-def calculate_skills_from_questionnaires(questionnaires: list, humility_score: int = 0) -> dict:
-    """Calculate skill scores from questionnaire answers."""
-    if not questionnaires:
+
+def calculate_skills(stats: AnswerStats, humility_score: int = 0) -> dict:
+    """Calculate skill scores from aggregated questionnaire answers (see questionnaire_stats.py)."""
+    if not stats.questionnaires:
         return {
             "戦略的計画力": 0,
             "課題設定・構想力": 0,
@@ -25,45 +37,20 @@ def calculate_skills_from_questionnaires(questionnaires: list, humility_score: i
             "謙虚である力": humility_score,
         }
 
-    total_q1_score = 0
-    q1_count = 0
-    interview_conducted_count = 0
-    interview_received_count = 0
-    could_extract_count = 0
-    could_speak_count = 0
-    extract_attempt_count = 0
-    speak_attempt_count = 0
-
-    for q in questionnaires:
-        answers = q.answers
-        if not answers:
-            continue
-
-        # Q1: 計画通りに行動できたか (1-5)
-        if answers.get("q1") is not None:
-            total_q1_score += answers["q1"]
-            q1_count += 1
-
-        # Q3: インタビュー
-        if answers.get("q3_didConduct"):
-            interview_conducted_count += 1
-            if answers.get("q3_couldExtract") is not None:
-                extract_attempt_count += 1
-                if answers["q3_couldExtract"]:
-                    could_extract_count += 1
-
-        if answers.get("q3_didReceive"):
-            interview_received_count += 1
-            if answers.get("q3_couldSpeak") is not None:
-                speak_attempt_count += 1
-                if answers["q3_couldSpeak"]:
-                    could_speak_count += 1
+    total_q1_score = stats.q1_total
+    q1_count = stats.q1_count
+    interview_conducted_count = stats.conducted
+    interview_received_count = stats.received
+    could_extract_count = stats.could_extract
+    could_speak_count = stats.could_speak
+    extract_attempt_count = stats.extract_attempts
+    speak_attempt_count = stats.speak_attempts
 
     # スコア計算 (0-100)
     strategic_planning = round(((total_q1_score / q1_count) - 1) / 4 * 100) if q1_count > 0 else 0
     execution = round(((total_q1_score / q1_count) - 1) / 4 * 100) if q1_count > 0 else 0
 
-    max_interviews = len(questionnaires) * 2
+    max_interviews = stats.questionnaires * 2
     total_interviews = interview_conducted_count + interview_received_count
     involvement = round((total_interviews / max_interviews) * 100) if max_interviews > 0 else 0
 
@@ -114,31 +101,29 @@ def generate_ai_comment(skills: dict) -> str:
 
 
 @router.get("", response_model=list[MonthlyResultResponse])
+@query_budget(2)
 def get_monthly_results(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all monthly results for the current user.
     Students can only see their own, teachers can see all.
     """
+    query = db.query(*MONTHLY_RESULT_COLUMNS)
     if current_user.role == 0:  # Student
-        results = db.query(MonthlyResult).filter(
-            MonthlyResult.user_id == current_user.id
-        ).order_by(MonthlyResult.year.desc(), MonthlyResult.month.desc()).all()
-    else:  # Teacher or Admin
-        results = db.query(MonthlyResult).order_by(
-            MonthlyResult.year.desc(), MonthlyResult.month.desc()
-        ).all()
+        query = query.filter(MonthlyResult.user_id == current_user.id)
+    results = query.order_by(MonthlyResult.year.desc(), MonthlyResult.month.desc()).all()
 
-    return results
+    # Column rows serialized straight to JSON (no per-row models, no re-validation)
+    return FastJSONResponse(rows_to_dicts(results))
 
 
 @router.get("/{result_id}", response_model=MonthlyResultResponse)
 def get_monthly_result(
     result_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific monthly result by ID."""
     result = db.query(MonthlyResult).filter(
@@ -191,26 +176,25 @@ def finalize_monthly_result(
             detail=f"{target_year}年{target_month}月の結果は既に確定済みです"
         )
 
-    # Get completed questionnaires for the target month
-    questionnaires = db.query(Questionnaire).filter(
+    # Aggregate the completed questionnaires of the target month in SQL
+    month_start = datetime(target_year, target_month, 1)
+    next_month = datetime(target_year + 1, 1, 1) if target_month == 12 else datetime(target_year, target_month + 1, 1)
+    stats = answer_stats(
+        db,
         Questionnaire.user_id == current_user.id,
-        Questionnaire.status == "completed"
-    ).all()
-
-    # Filter questionnaires for the target month
-    monthly_questionnaires = [
-        q for q in questionnaires
-        if q.created_at.year == target_year and q.created_at.month == target_month
-    ]
+        Questionnaire.status == "completed",
+        Questionnaire.created_at >= month_start,
+        Questionnaire.created_at < next_month
+    )
 
-    if not monthly_questionnaires:
+    if not stats.questionnaires:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"{target_year}年{target_month}月のアンケートがありません"
         )
 
     # Calculate skills
-    skills = calculate_skills_from_questionnaires(monthly_questionnaires, humility_score)
+    skills = calculate_skills(stats, humility_score)
     level = calculate_level(skills)
     ai_comment = generate_ai_comment(skills)
 
@@ -227,6 +211,7 @@ def finalize_monthly_result(
 
     db.add(monthly_result)
     db.commit()
+    invalidate_class(current_user.class_name)
     db.refresh(monthly_result)
 
     return monthly_result
@@ -235,7 +220,7 @@ def finalize_monthly_result(
 @router.get("/current", response_model=Optional[MonthlyResultResponse])
 def get_current_month_result(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get the monthly result for the current month if it exists.
@@ -0,0 +1,197 @@
+"""
+Local stand-in for the OpenAI chat-completions API.
+
+Lets `evaluate_content_with_ai` and `generate_skill_advice` be exercised
+offline. Point the backend at it with:
+
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8001/v1 uvicorn main:app
+
+Run standalone:
+
+    python openai_mock.py --port 8001 --latency lognormal:-1.6,0.5 --error-rate 0.05
+
+Latency specs (seconds):
+    fixed:0.2            always 0.2s
+    uniform:0.1,0.5      uniformly between 0.1s and 0.5s
+    normal:0.3,0.1       normal(mean, stddev), clamped at 0
+    lognormal:-1.6,0.5   lognormal(mu, sigma) - long tail like the real API
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class MockConfig:
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    error_status: int = 500
+    stream_chunk_delay: float = 0.01
+    seed: Optional[int] = None
+
+
+def parse_latency(spec: str):
+    """Turn a latency spec like 'uniform:0.1,0.5' into a sampler function."""
+    kind, _, args = spec.partition(":")
+    params = [float(v) for v in args.split(",") if v.strip()] if args else []
+
+    if kind == "fixed":
+        value = params[0] if params else 0.0
+        return lambda rng: value
+    if kind == "uniform":
+        low, high = params
+        return lambda rng: rng.uniform(low, high)
+    if kind == "normal":
+        mean, stddev = params
+        return lambda rng: max(0.0, rng.gauss(mean, stddev))
+    if kind == "lognormal":
+        mu, sigma = params
+        return lambda rng: rng.lognormvariate(mu, sigma)
+
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def _build_reply(messages: list[dict]) -> str:
+    """Produce a plausible answer for the prompts used in main.py."""
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    prompt = " ".join(m.get("content", "") for m in messages if m.get("role") == "user")
+
+    if "JSON" in system:
+        # Skill advice prompt: "- 戦略的計画力: 75点"
+        skills = re.findall(r"^- (.+?): (\d+)点$", prompt, re.MULTILINE)
+        return json.dumps(
+            {skill: f"{skill}（{score}点）を伸ばすために、今週できることを一つ決めて取り組んでみましょう。"
+             for skill, score in skills},
+            ensure_ascii=False
+        )
+
+    # Evaluation prompt: "0から{max_score}点で評価し"
+    match = re.search(r"0から(\d+)点で評価", prompt)
+    max_score = int(match.group(1)) if match else 10
+    return str(max_score * 2 // 3)
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    """Create the mock API app for the given configuration."""
+    app = FastAPI(title="OpenAI Mock", version="1.0.0")
+    rng = random.Random(config.seed)
+    sample_latency = parse_latency(config.latency)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(sample_latency(rng))
+
+        if config.error_rate and rng.random() < config.error_rate:
+            return JSONResponse(
+                status_code=config.error_status,
+                content={"error": {
+                    "message": "Mock upstream error",
+                    "type": "server_error",
+                    "code": None,
+                }}
+            )
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "gpt-3.5-turbo")
+        content = _build_reply(body.get("messages", []))
+
+        if body.get("stream"):
+            async def event_stream():
+                pieces = [content[i:i + 8] for i in range(0, len(content), 8)] or [""]
+                for index, piece in enumerate(pieces):
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"role": "assistant", "content": piece} if index == 0 else {"content": piece},
+                            "finish_reason": None,
+                        }],
+                    }
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(config.stream_chunk_delay)
+                final = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+
+def start_in_thread(config: MockConfig, host: str = "127.0.0.1", port: int = 8001):
+    """Start the mock server in a daemon thread and wait until it accepts requests."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("OpenAI mock did not start in time")
+        time.sleep(0.05)
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI chat-completions mock")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="fixed:0", help="e.g. fixed:0.2, uniform:0.1,0.5, lognormal:-1.6,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail (0-1)")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = MockConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stream_chunk_delay=args.stream_chunk_delay,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
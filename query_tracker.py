@@ -0,0 +1,138 @@
+"""
+Per-request SQL instrumentation.
+
+- Counts queries and DB time for each request and reports them in a
+  `Server-Timing: db;dur=<ms>;desc="<n> queries"` response header.
+- Logs a warning when the same statement runs many times in one request
+  (the usual N+1 lazy-load pattern).
+- Strict mode (QUERY_BUDGET_STRICT=1, meant for tests and the load test)
+  raises `QueryBudgetExceeded` when a route issues more queries than its
+  budget, so the request fails with a 500 instead of silently regressing.
+
+Budgets default to QUERY_BUDGET_DEFAULT and can be set per endpoint with
+the `query_budget(n)` decorator.
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from metrics import DEPENDENCY_SECONDS, DEPENDENCY_CALLS, DEPENDENCY_ERRORS
+
+logger = logging.getLogger(__name__)
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", "25"))
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "").lower() in ("1", "true", "yes")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a request issues more queries than allowed."""
+
+
+class RequestQueryStats:
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statements executed at least `threshold` times."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    """Stats for the request being served, or None outside a request."""
+    return _current_stats.get()
+
+
+def query_budget(max_queries: int):
+    """Decorator setting the maximum number of queries an endpoint may issue."""
+    def decorator(func):
+        func.__query_budget__ = max_queries
+        return func
+    return decorator
+
+
+def instrument_engine(engine):
+    """Attach cursor-execute hooks feeding per-request stats and the "db" metrics."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        DEPENDENCY_SECONDS.inc("db", amount=elapsed)
+        DEPENDENCY_CALLS.inc("db")
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+            stats.statements[statement] += 1
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+        DEPENDENCY_ERRORS.inc("db")
+
+
+class QueryTrackingMiddleware:
+    """ASGI middleware that scopes query stats to a request and reports them."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _check(self, scope, stats: RequestQueryStats):
+        route = scope.get("path", "")
+
+        for statement, times in stats.repeated():
+            logger.warning(
+                "Possible N+1 on %s %s: statement executed %d times: %s",
+                scope["method"], route, times, " ".join(statement.split())[:200]
+            )
+
+        if QUERY_BUDGET_STRICT:
+            budget = getattr(scope.get("endpoint"), "__query_budget__", QUERY_BUDGET_DEFAULT)
+            if stats.count > budget:
+                raise QueryBudgetExceeded(
+                    f"{scope['method']} {route} issued {stats.count} queries (budget {budget})"
+                )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                self._check(scope, stats)
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'.encode()
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
@@ -1,53 +1,421 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+from datetime import datetime, date, timedelta
+from typing import Optional, Literal
+import csv
+import io
+import json
+import os
 
-from database import get_db
-from models import User, Questionnaire
-from schemas import QuestionnaireResponse, QuestionnaireSubmit
+from database import get_db, ReplicaSessionLocal
+from read_replica import get_read_db
+from models import User, Questionnaire, QuestionnaireTemplate
+from schemas import (
+    QuestionnaireAnswers, QuestionnaireResponse, QuestionnaireSubmit, QuestionnaireIssueRequest, QuestionnaireIssueResponse,
+    QuestionnaireTemplateResponse, QuestionnaireTemplateUpdate, QuestionnaireStatsResponse,
+    QuestionnaireSearchResponse
+)
 from auth import get_current_user
+from audit import create_audit_log
+from questionnaire_scheduler import issue_weekly_questionnaires, default_title
+from query_tracker import query_budget
+from fast_json import FastJSONResponse, rows_to_dicts, dumps
+from questionnaire_stats import AnswerStats, answer_stats_query
+from gratitude_routes import sync_gratitude_edges
+from search_index import index_questionnaire, search_questionnaires
+from class_routes import invalidate_class, invalidate_all_classes
 
 router = APIRouter(prefix="/questionnaires", tags=["questionnaires"])
 
+# Columns of QuestionnaireResponse, for the fast list path (join QuestionnaireTemplate)
+QUESTIONNAIRE_COLUMNS = (
+    Questionnaire.id, Questionnaire.user_id, QuestionnaireTemplate.week, QuestionnaireTemplate.title,
+    QuestionnaireTemplate.deadline, Questionnaire.status, Questionnaire.answers,
+    Questionnaire.submitted_at, Questionnaire.created_at, Questionnaire.updated_at,
+)
+
+# Rows fetched per round trip by the export's server-side cursor
+EXPORT_YIELD_PER = int(os.getenv("QUESTIONNAIRE_EXPORT_YIELD_PER", "1000"))
+
+# Export columns: questionnaire/student metadata, then every answer field flattened
+EXPORT_META_FIELDS = [
+    "questionnaire_id", "user_id", "email", "name", "class_name", "week", "title", "submitted_at",
+]
+EXPORT_ANSWER_FIELDS = list(QuestionnaireAnswers.model_fields)
+EXPORT_FIELDS = EXPORT_META_FIELDS + EXPORT_ANSWER_FIELDS
+
+
+def get_questionnaire_or_404(db: Session, questionnaire_id: str) -> Questionnaire:
+    """Load a questionnaire together with its template."""
+    questionnaire = db.query(Questionnaire).options(
+        joinedload(Questionnaire.template)
+    ).filter(
+        Questionnaire.id == questionnaire_id
+    ).first()
+
+    if not questionnaire:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Questionnaire not found"
+        )
+    return questionnaire
+
 
 @router.get("", response_model=list[QuestionnaireResponse])
+@query_budget(2)
 def get_questionnaires(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all questionnaires for the current user.
     Students can only see their own, teachers can see all.
     """
+    query = db.query(*QUESTIONNAIRE_COLUMNS).join(Questionnaire.template)
     if current_user.role == 0:  # Student
-        questionnaires = db.query(Questionnaire).filter(
-            Questionnaire.user_id == current_user.id
-        ).order_by(Questionnaire.week.desc()).all()
-    else:  # Teacher or Admin
-        questionnaires = db.query(Questionnaire).order_by(
-            Questionnaire.week.desc()
-        ).all()
+        query = query.filter(Questionnaire.user_id == current_user.id)
+    questionnaires = query.order_by(QuestionnaireTemplate.week.desc()).all()
 
-    return questionnaires
+    # Column rows serialized straight to JSON (no per-row models, no re-validation)
+    return FastJSONResponse(rows_to_dicts(questionnaires))
 
 
-@router.get("/{questionnaire_id}", response_model=QuestionnaireResponse)
-def get_questionnaire(
-    questionnaire_id: str,
+def _export_rows(class_name: Optional[str], date_from: Optional[date], date_to: Optional[date]):
+    """
+    Yield flattened completed-questionnaire dicts, streamed with a server-side cursor.
+
+    Uses its own session so it does not depend on the request's session
+    staying open while the response body is sent.
+    """
+    statement = select(
+        Questionnaire.id, Questionnaire.user_id, User.email, User.name, User.class_name,
+        QuestionnaireTemplate.week, QuestionnaireTemplate.title,
+        Questionnaire.submitted_at, Questionnaire.answers
+    ).join(
+        User, Questionnaire.user_id == User.id
+    ).join(
+        QuestionnaireTemplate, Questionnaire.template_id == QuestionnaireTemplate.id
+    ).where(
+        Questionnaire.status == "completed"
+    )
+    if class_name:
+        statement = statement.where(User.class_name == class_name)
+    if date_from:
+        statement = statement.where(Questionnaire.submitted_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        # Inclusive of the whole end day
+        end = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+        statement = statement.where(Questionnaire.submitted_at < end)
+    statement = statement.order_by(
+        QuestionnaireTemplate.week, User.class_name, User.name, Questionnaire.id
+    ).execution_options(yield_per=EXPORT_YIELD_PER)
+
+    # Bulk read: always served by the replica when one is configured
+    db = ReplicaSessionLocal()
+    try:
+        for row in db.execute(statement):
+            answers = row.answers or {}
+            record = {
+                "questionnaire_id": row.id,
+                "user_id": row.user_id,
+                "email": row.email,
+                "name": row.name,
+                "class_name": row.class_name,
+                "week": row.week,
+                "title": row.title,
+                "submitted_at": row.submitted_at,
+            }
+            for field in EXPORT_ANSWER_FIELDS:
+                record[field] = answers.get(field)
+            yield record
+    finally:
+        db.close()
+
+
+def _ndjson_stream(records, batch_size: int = 200):
+    lines = []
+    for record in records:
+        lines.append(dumps(record))
+        if len(lines) >= batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _csv_stream(records, batch_size: int = 200):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens the Japanese text as UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for record in records:
+        writer.writerow([_csv_cell(record[field]) for field in EXPORT_FIELDS])
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+@router.get("/export")
+def export_questionnaire_answers(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    class_name: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get a specific questionnaire by ID."""
-    questionnaire = db.query(Questionnaire).filter(
-        Questionnaire.id == questionnaire_id
-    ).first()
+    """
+    Stream completed questionnaire answers (q1/q2/q3 fields flattened) as NDJSON or CSV.
 
-    if not questionnaire:
+    - Only teachers and admins can export
+    - Optional filters: class_name, submitted date range (date_from / date_to, inclusive)
+    - Rows are read with a server-side cursor, so memory stays flat for any export size
+    """
+    if current_user.role not in [1, 2]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers and administrators can export answers"
+        )
+
+    # Log the action
+    create_audit_log(
+        db,
+        current_user.id,
+        f"export_questionnaires:{format}:{class_name or 'all'}",
+        request.client.host if request.client else None
+    )
+
+    records = _export_rows(class_name, date_from, date_to)
+    filename = f"questionnaire_answers.{'csv' if format == 'csv' else 'ndjson'}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "csv":
+        return StreamingResponse(_csv_stream(records), media_type="text/csv", headers=headers)
+    return StreamingResponse(_ndjson_stream(records), media_type="application/x-ndjson", headers=headers)
+
+
+def _rate(part: int, whole: int) -> Optional[float]:
+    return round(part / whole, 4) if whole else None
+
+
+@router.get("/stats", response_model=list[QuestionnaireStatsResponse])
+@query_budget(2)
+def get_questionnaire_stats(
+    class_name: Optional[str] = None,
+    week: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Answer statistics of completed questionnaires per week and class (one SQL aggregate).
+
+    - Only teachers and admins can access this endpoint
+    - Optional filters: class_name, week
+    """
+    if current_user.role not in [1, 2]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers and administrators can view statistics"
+        )
+
+    filters = [Questionnaire.status == "completed"]
+    if class_name:
+        filters.append(User.class_name == class_name)
+    if week is not None:
+        filters.append(QuestionnaireTemplate.week == week)
+
+    statement = answer_stats_query(
+        *filters, group_by=(QuestionnaireTemplate.week, User.class_name)
+    ).join(
+        User, Questionnaire.user_id == User.id
+    ).join(
+        QuestionnaireTemplate, Questionnaire.template_id == QuestionnaireTemplate.id
+    ).order_by(QuestionnaireTemplate.week.desc(), User.class_name)
+
+    results = []
+    for row in db.execute(statement):
+        stats = AnswerStats.from_row(row)
+        results.append({
+            "week": row.week,
+            "class_name": row.class_name,
+            "completed": stats.questionnaires,
+            "q1_average": round(stats.q1_average, 2) if stats.q1_average is not None else None,
+            "gratitude_rate": _rate(stats.gratitude, stats.questionnaires),
+            "conduct_rate": _rate(stats.conducted, stats.questionnaires),
+            "extract_rate": _rate(stats.could_extract, stats.extract_attempts),
+            "receive_rate": _rate(stats.received, stats.questionnaires),
+            "speak_rate": _rate(stats.could_speak, stats.speak_attempts),
+        })
+    return FastJSONResponse(results)
+
+
+@router.get("/search", response_model=QuestionnaireSearchResponse)
+@query_budget(2)
+def search_questionnaire_answers(
+    q: str,
+    class_name: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = 20,
+    offset: int = 0,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Full-text search over free-text answers (interview notes, insights, gratitude messages).
+
+    - Only teachers and admins can search
+    - Space-separated terms must all match; results are ranked by relevance
+    - Optional filters: class_name, submitted date range (inclusive)
+    - Paginated: pass `next_offset` from the previous page as `offset`
+    """
+    if current_user.role not in [1, 2]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers and administrators can search answers"
+        )
+    limit = max(1, min(limit, 100))
+
+    items = search_questionnaires(
+        db,
+        q,
+        class_name=class_name,
+        date_from=datetime.combine(date_from, datetime.min.time()) if date_from else None,
+        date_to=datetime.combine(date_to + timedelta(days=1), datetime.min.time()) if date_to else None,
+        limit=limit + 1,
+        offset=max(0, offset)
+    )
+    next_offset = max(0, offset) + limit if len(items) > limit else None
+    return FastJSONResponse({"items": items[:limit], "next_offset": next_offset})
+
+
+@router.post("/issue", response_model=QuestionnaireIssueResponse)
+def issue_questionnaires(
+    issue: QuestionnaireIssueRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Admin-only endpoint to issue the week-N questionnaire to every active student.
+
+    - Optionally limited to one class
+    - Idempotent: students who already have that week's questionnaire are skipped
+    - Title and deadline are taken from the request only when the week is issued for the first time
+      (change them afterwards with PATCH /questionnaires/templates/{template_id})
+    """
+    # Check if current user is admin
+    if current_user.role != 2:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can issue questionnaires"
+        )
+
+    issued = issue_weekly_questionnaires(
+        db,
+        week=issue.week,
+        title=issue.title or default_title(issue.week),
+        deadline=issue.deadline,
+        class_name=issue.class_name
+    )
+    if issue.class_name:
+        invalidate_class(issue.class_name)
+    else:
+        invalidate_all_classes()
+
+    # Log the action
+    create_audit_log(
+        db,
+        current_user.id,
+        f"issue_questionnaires:week{issue.week}:{issued}",
+        request.client.host if request.client else None
+    )
+
+    return QuestionnaireIssueResponse(week=issue.week, class_name=issue.class_name, issued=issued)
+
+
+@router.get("/templates", response_model=list[QuestionnaireTemplateResponse])
+def get_questionnaire_templates(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Get all questionnaire templates (week, title, deadline), newest week first."""
+    return db.query(QuestionnaireTemplate).order_by(QuestionnaireTemplate.week.desc()).all()
+
+
+@router.patch("/templates/{template_id}", response_model=QuestionnaireTemplateResponse)
+def update_questionnaire_template(
+    template_id: str,
+    update: QuestionnaireTemplateUpdate,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Admin-only endpoint to change a week's title or deadline.
+
+    - Applies to every student's questionnaire of that week (single-row update)
+    """
+    # Check if current user is admin
+    if current_user.role != 2:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can update questionnaire templates"
+        )
+
+    template = db.query(QuestionnaireTemplate).filter(QuestionnaireTemplate.id == template_id).first()
+    if not template:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Questionnaire not found"
+            detail="Questionnaire template not found"
         )
 
+    if update.title is not None:
+        template.title = update.title
+    if update.deadline is not None:
+        template.deadline = update.deadline
+
+    db.commit()
+    invalidate_all_classes()
+    db.refresh(template)
+
+    # Log the action
+    create_audit_log(
+        db,
+        current_user.id,
+        f"update_questionnaire_template:week{template.week}",
+        request.client.host if request.client else None
+    )
+
+    return template
+
+
+@router.get("/{questionnaire_id}", response_model=QuestionnaireResponse)
+def get_questionnaire(
+    questionnaire_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Get a specific questionnaire by ID."""
+    questionnaire = get_questionnaire_or_404(db, questionnaire_id)
+
     # Check permissions
     if current_user.role == 0 and questionnaire.user_id != current_user.id:
         raise HTTPException(
@@ -66,15 +434,7 @@ def submit_questionnaire(
     db: Session = Depends(get_db)
 ):
     """Submit answers to a questionnaire."""
-    questionnaire = db.query(Questionnaire).filter(
-        Questionnaire.id == questionnaire_id
-    ).first()
-
-    if not questionnaire:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Questionnaire not found"
-        )
+    questionnaire = get_questionnaire_or_404(db, questionnaire_id)
 
     # Check permissions
     if questionnaire.user_id != current_user.id:
@@ -91,11 +451,14 @@ def submit_questionnaire(
         )
 
     # Update questionnaire
-    questionnaire.answers = submission.answers.model_dump()
+    questionnaire.set_answers(submission.answers.model_dump())
+    sync_gratitude_edges(db, questionnaire)
+    index_questionnaire(db, questionnaire)
     questionnaire.status = "completed"
     questionnaire.submitted_at = datetime.utcnow()
 
     db.commit()
+    invalidate_class(current_user.class_name)
     db.refresh(questionnaire)
 
     return questionnaire
@@ -109,15 +472,7 @@ def update_questionnaire(
     db: Session = Depends(get_db)
 ):
     """Update answers to a questionnaire (before deadline)."""
-    questionnaire = db.query(Questionnaire).filter(
-        Questionnaire.id == questionnaire_id
-    ).first()
-
-    if not questionnaire:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Questionnaire not found"
-        )
+    questionnaire = get_questionnaire_or_404(db, questionnaire_id)
 
     # Check permissions
     if questionnaire.user_id != current_user.id:
@@ -134,12 +489,15 @@ def update_questionnaire(
         )
 
     # Update questionnaire
-    questionnaire.answers = submission.answers.model_dump()
+    questionnaire.set_answers(submission.answers.model_dump())
+    sync_gratitude_edges(db, questionnaire)
+    index_questionnaire(db, questionnaire)
     questionnaire.status = "completed"
     if not questionnaire.submitted_at:
         questionnaire.submitted_at = datetime.utcnow()
 
     db.commit()
+    invalidate_class(current_user.class_name)
     db.refresh(questionnaire)
 
     return questionnaire
@@ -0,0 +1,150 @@
+"""
+Weekly questionnaire issuance.
+
+Issues the week-N questionnaire to every active student (optionally one
+class) with a single candidate query and batched bulk inserts. The week's
+title and deadline live in one QuestionnaireTemplate row, created on first
+issue; issuing the week again (e.g. for another class) reuses it as is.
+Inserts use INSERT OR IGNORE (SQLite) / INSERT IGNORE (MySQL) against the
+unique (user_id, template_id) index, so re-running a week - from cron, the
+admin endpoint or two instances at once - never creates duplicates and
+only costs the candidate query.
+
+Usage (e.g. from a weekly cron job):
+    python questionnaire_scheduler.py --week 5 --deadline 2024-11-04T23:59:59
+    python questionnaire_scheduler.py --week 5 --deadline 2024-11-04T23:59:59 --class 1-A
+"""
+
+import argparse
+import os
+import sys
+import io
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert, select, exists, and_
+from sqlalchemy.orm import Session
+
+from models import User, Questionnaire, QuestionnaireTemplate
+
+ISSUE_BATCH_SIZE = int(os.getenv("QUESTIONNAIRE_ISSUE_BATCH_SIZE", "1000"))
+
+
+def default_title(week: int) -> str:
+    return f"第{week}週 週次アンケート"
+
+
+def _insert_ignore(model, dialect_name: str):
+    """INSERT that skips rows violating a unique key, for this dialect."""
+    statement = insert(model)
+    if dialect_name == "sqlite":
+        return statement.prefix_with("OR IGNORE")
+    if dialect_name == "mysql":
+        return statement.prefix_with("IGNORE")
+    return statement
+
+
+def get_or_create_template(db: Session, week: int, title: str, deadline: datetime) -> QuestionnaireTemplate:
+    """Return the week's template, creating it with `title` and `deadline` if missing."""
+    template = db.query(QuestionnaireTemplate).filter(QuestionnaireTemplate.week == week).first()
+    if template:
+        return template
+
+    now = datetime.utcnow()
+    statement = _insert_ignore(QuestionnaireTemplate, db.get_bind().dialect.name)
+    db.connection().execute(statement, [{
+        "id": str(uuid.uuid4()), "week": week, "title": title, "deadline": deadline,
+        "created_at": now, "updated_at": now,
+    }])
+    db.commit()
+    # Re-read: another instance may have created it first
+    return db.query(QuestionnaireTemplate).filter(QuestionnaireTemplate.week == week).one()
+
+
+def issue_weekly_questionnaires(
+    db: Session,
+    week: int,
+    title: str,
+    deadline: datetime,
+    class_name: str = None
+) -> int:
+    """
+    Create the week's questionnaire for every active student that lacks one.
+
+    `title` and `deadline` only apply when the week's template is created.
+    Returns the number of questionnaires created.
+    """
+    template_id = get_or_create_template(db, week, title, deadline).id
+
+    # Active students without this week's questionnaire, in one query
+    already_issued = exists().where(and_(
+        Questionnaire.user_id == User.id,
+        Questionnaire.template_id == template_id
+    ))
+    candidates = select(User.id).where(
+        User.role == 0,
+        User.is_active == True,
+        ~already_issued
+    )
+    if class_name:
+        candidates = candidates.where(User.class_name == class_name)
+    user_ids = db.execute(candidates).scalars().all()
+    if not user_ids:
+        return 0
+
+    now = datetime.utcnow()
+    statement = _insert_ignore(Questionnaire, db.get_bind().dialect.name)
+    issued = 0
+    for start in range(0, len(user_ids), ISSUE_BATCH_SIZE):
+        batch = [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "template_id": template_id,
+                "status": "pending",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for user_id in user_ids[start:start + ISSUE_BATCH_SIZE]
+        ]
+        # Core executemany on the session's connection, so rowcount is reported
+        result = db.connection().execute(statement, batch)
+        # Rows skipped by IGNORE (issued concurrently) are not counted
+        issued += result.rowcount if result.rowcount >= 0 else len(batch)
+        db.commit()
+
+    return issued
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Issue the weekly questionnaire to active students")
+    parser.add_argument("--week", type=int, required=True)
+    parser.add_argument("--deadline", required=True, help="ISO datetime, e.g. 2024-11-04T23:59:59")
+    parser.add_argument("--title", help="Defaults to 第N週 週次アンケート")
+    parser.add_argument("--class", dest="class_name", help="Only issue to this class")
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        issued = issue_weekly_questionnaires(
+            db,
+            week=args.week,
+            title=args.title or default_title(args.week),
+            deadline=datetime.fromisoformat(args.deadline),
+            class_name=args.class_name
+        )
+    finally:
+        db.close()
+
+    target = f"class {args.class_name}" if args.class_name else "all classes"
+    print(f"✓ Issued {issued} questionnaire(s) for week {args.week} ({target})")
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    main()
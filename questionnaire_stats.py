@@ -0,0 +1,77 @@
+"""
+SQL aggregates over the typed questionnaire answer columns.
+
+`answer_stats_query` returns one row of counts for any set of filters (or
+one row per group with `group_by`), so skill scores and class statistics
+are computed by the database instead of loading and parsing every answers
+JSON in Python.
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import select, func, case, and_
+
+from models import Questionnaire
+
+
+def count_if(condition):
+    """Number of rows matching `condition` (0, not NULL, when none do)."""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+# Aggregate expressions, labelled by AnswerStats field
+STAT_COLUMNS = (
+    func.count(Questionnaire.id).label("questionnaires"),
+    func.coalesce(func.sum(Questionnaire.q1), 0).label("q1_total"),
+    func.count(Questionnaire.q1).label("q1_count"),
+    count_if(Questionnaire.q2_has_gratitude == True).label("gratitude"),
+    count_if(Questionnaire.q3_did_conduct == True).label("conducted"),
+    count_if(and_(
+        Questionnaire.q3_did_conduct == True, Questionnaire.q3_could_extract.isnot(None)
+    )).label("extract_attempts"),
+    count_if(and_(
+        Questionnaire.q3_did_conduct == True, Questionnaire.q3_could_extract == True
+    )).label("could_extract"),
+    count_if(Questionnaire.q3_did_receive == True).label("received"),
+    count_if(and_(
+        Questionnaire.q3_did_receive == True, Questionnaire.q3_could_speak.isnot(None)
+    )).label("speak_attempts"),
+    count_if(and_(
+        Questionnaire.q3_did_receive == True, Questionnaire.q3_could_speak == True
+    )).label("could_speak"),
+)
+
+
+@dataclass
+class AnswerStats:
+    questionnaires: int = 0
+    q1_total: int = 0
+    q1_count: int = 0
+    gratitude: int = 0
+    conducted: int = 0
+    extract_attempts: int = 0
+    could_extract: int = 0
+    received: int = 0
+    speak_attempts: int = 0
+    could_speak: int = 0
+
+    @classmethod
+    def from_row(cls, row) -> "AnswerStats":
+        return cls(**{column.name: int(row._mapping[column.name] or 0) for column in STAT_COLUMNS})
+
+    @property
+    def q1_average(self) -> float | None:
+        return self.q1_total / self.q1_count if self.q1_count else None
+
+
+def answer_stats_query(*filters, group_by=()):
+    """SELECT of the aggregates over questionnaires matching `filters` (join other tables as needed)."""
+    statement = select(*group_by, *STAT_COLUMNS).select_from(Questionnaire).where(*filters)
+    if group_by:
+        statement = statement.group_by(*group_by)
+    return statement
+
+
+def answer_stats(db, *filters) -> AnswerStats:
+    """Aggregate counts over questionnaires matching `filters`, in one query."""
+    return AnswerStats.from_row(db.execute(answer_stats_query(*filters)).one())
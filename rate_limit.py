@@ -0,0 +1,195 @@
+"""
+Login rate limiting.
+
+Every /auth/login attempt costs a user lookup and a bcrypt verification,
+so a misbehaving client or a credential-stuffing burst can pin every core.
+`login_limiter.check()` runs first in the login endpoint and rejects
+throttled attempts with 429 before any DB or bcrypt work:
+
+  per IP     at most LOGIN_RATE_PER_IP attempts per LOGIN_RATE_WINDOW seconds
+             (sliding window)
+  per email  at most LOGIN_RATE_PER_EMAIL attempts per window (sliding
+             window), against guessing spread over many IPs
+  per IP and email
+             a backoff after LOGIN_BACKOFF_AFTER consecutive failures:
+             LOGIN_BACKOFF_BASE seconds, doubling per further failure, capped
+             at LOGIN_BACKOFF_MAX. A success resets it; a streak older than
+             LOGIN_BACKOFF_MAX is forgotten. Keyed on the pair so that wrong
+             passwords from one address cannot lock the student out
+             everywhere else.
+
+A whole class logging in at once from a school's shared NAT looks like one
+IP, so LOGIN_RATE_IP_ALLOWANCES gives specific addresses or networks their
+own per-IP limit ("203.0.113.0/24=600,198.51.100.7=0", 0 = unlimited). The
+per-email limits still apply to them.
+
+State is per process (each worker limits on its own). Behind a reverse
+proxy set FORWARDED_PROXY_HOPS (1 on App Service) so the client address is
+taken from X-Forwarded-For instead of the proxy's.
+"""
+
+import ipaddress
+import os
+import threading
+import time
+from collections import deque
+
+from fastapi import Request
+
+from metrics import REGISTRY
+
+LOGIN_RATE_ENABLED = os.getenv("LOGIN_RATE_ENABLED", "true").lower() in ("1", "true", "yes")
+LOGIN_RATE_WINDOW = float(os.getenv("LOGIN_RATE_WINDOW", "60"))
+LOGIN_RATE_PER_IP = int(os.getenv("LOGIN_RATE_PER_IP", "60"))
+LOGIN_RATE_PER_EMAIL = int(os.getenv("LOGIN_RATE_PER_EMAIL", "10"))
+LOGIN_RATE_IP_ALLOWANCES = os.getenv("LOGIN_RATE_IP_ALLOWANCES", "")
+LOGIN_BACKOFF_AFTER = int(os.getenv("LOGIN_BACKOFF_AFTER", "5"))
+LOGIN_BACKOFF_BASE = float(os.getenv("LOGIN_BACKOFF_BASE", "2"))
+LOGIN_BACKOFF_MAX = float(os.getenv("LOGIN_BACKOFF_MAX", "900"))
+FORWARDED_PROXY_HOPS = int(os.getenv("FORWARDED_PROXY_HOPS", "0"))
+
+# Idle keys are swept (at most once per window) once this many are tracked
+_SWEEP_AT = 50000
+
+LOGIN_THROTTLED = REGISTRY.counter(
+    "hughigh_login_throttled_total",
+    "Login attempts rejected with 429 before any DB or bcrypt work, by reason.",
+    ("reason",),
+)
+LOGIN_FAILURES = REGISTRY.counter(
+    "hughigh_login_failures_total",
+    "Failed login attempts (unknown email or wrong password).",
+)
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address, read from X-Forwarded-For behind FORWARDED_PROXY_HOPS proxies."""
+    if FORWARDED_PROXY_HOPS:
+        forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        if len(forwarded) >= FORWARDED_PROXY_HOPS:
+            return forwarded[-FORWARDED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+def parse_allowances(spec: str) -> list[tuple]:
+    """"addr_or_cidr=limit,..." -> [(network or literal address, limit)]."""
+    allowances = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        address, _, limit = item.partition("=")
+        address = address.strip()
+        try:
+            target = ipaddress.ip_network(address, strict=False)
+        except ValueError:
+            target = address  # Non-IP client names (e.g. the TestClient's "testclient")
+        allowances.append((target, int(limit)))
+    return allowances
+
+
+class SlidingWindow:
+    """At most `limit` events per `window` seconds for each key (limit 0 = unlimited)."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._events: dict[str, deque] = {}
+
+    def hit(self, key: str, limit: int, now: float) -> float | None:
+        """Record an event and return None, or return the seconds until one is allowed."""
+        if limit <= 0:
+            return None
+        events = self._events.get(key)
+        if events is None or events.maxlen != limit:
+            events = self._events[key] = deque(events or (), maxlen=limit)
+        if len(events) == limit and now - events[0] < self.window:
+            return self.window - (now - events[0])
+        events.append(now)
+        return None
+
+    def sweep(self, now: float):
+        for key in [k for k, events in self._events.items() if not events or now - events[-1] >= self.window]:
+            del self._events[key]
+
+    def __len__(self):
+        return len(self._events)
+
+
+class LoginRateLimiter:
+    def __init__(self):
+        self.allowances = parse_allowances(LOGIN_RATE_IP_ALLOWANCES)
+        self._ip_window = SlidingWindow(LOGIN_RATE_WINDOW)
+        self._email_window = SlidingWindow(LOGIN_RATE_WINDOW)
+        # (ip, email) -> (consecutive failures, time of the last one)
+        self._failures: dict[tuple[str, str], tuple[int, float]] = {}
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def ip_limit(self, ip: str) -> int:
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            address = None
+        for target, limit in self.allowances:
+            if target == ip or (address is not None and not isinstance(target, str) and address in target):
+                return limit
+        return LOGIN_RATE_PER_IP
+
+    def _backoff(self, ip: str, email: str, now: float) -> float | None:
+        failures, last = self._failures.get((ip, email), (0, 0.0))
+        if failures < LOGIN_BACKOFF_AFTER:
+            return None
+        delay = min(LOGIN_BACKOFF_BASE * 2 ** (failures - LOGIN_BACKOFF_AFTER), LOGIN_BACKOFF_MAX)
+        remaining = last + delay - now
+        return remaining if remaining > 0 else None
+
+    def check(self, ip: str, email: str) -> float | None:
+        """
+        Count a login attempt. Returns None if it may proceed, otherwise the
+        seconds the caller should wait.
+        """
+        if not LOGIN_RATE_ENABLED:
+            return None
+        email = email.strip().lower()
+        now = time.monotonic()
+        with self._lock:
+            tracked = len(self._ip_window) + len(self._email_window) + len(self._failures)
+            if tracked >= _SWEEP_AT and now - self._last_sweep >= LOGIN_RATE_WINDOW:
+                self._sweep(now)
+
+            retry_after = self._backoff(ip, email, now)
+            if retry_after is not None:
+                LOGIN_THROTTLED.inc("backoff")
+                return retry_after
+            retry_after = self._ip_window.hit(ip, self.ip_limit(ip), now)
+            if retry_after is not None:
+                LOGIN_THROTTLED.inc("ip")
+                return retry_after
+            retry_after = self._email_window.hit(email, LOGIN_RATE_PER_EMAIL, now)
+            if retry_after is not None:
+                LOGIN_THROTTLED.inc("email")
+                return retry_after
+        return None
+
+    def record_failure(self, ip: str, email: str):
+        LOGIN_FAILURES.inc()
+        if not LOGIN_RATE_ENABLED:
+            return
+        key = (ip, email.strip().lower())
+        now = time.monotonic()
+        with self._lock:
+            failures, last = self._failures.get(key, (0, now))
+            if now - last > LOGIN_BACKOFF_MAX:
+                failures = 0
+            self._failures[key] = (failures + 1, now)
+
+    def record_success(self, ip: str, email: str):
+        with self._lock:
+            self._failures.pop((ip, email.strip().lower()), None)
+
+    def _sweep(self, now: float):
+        self._last_sweep = now
+        self._ip_window.sweep(now)
+        self._email_window.sweep(now)
+        for key in [k for k, (_, last) in self._failures.items() if now - last > LOGIN_BACKOFF_MAX]:
+            del self._failures[key]
+
+
+login_limiter = LoginRateLimiter()
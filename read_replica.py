@@ -0,0 +1,128 @@
+"""
+Read-replica routing.
+
+When DATABASE_REPLICA_URL is set, read-only endpoints take their session
+from `get_read_db` instead of `get_db`, so list and dashboard reads are
+served by the replica and do not compete with writes on the primary.
+Writes (and every endpoint still on `get_db`) always use the primary.
+
+Replicas lag a little behind, so a client that has just written something
+should not read an older copy of it: `ReadYourWritesMiddleware` answers
+each successful authenticated non-GET request with a short-lived
+`read_primary_until` cookie, and `get_read_db` keeps the reads of a
+client presenting it on the primary for READ_YOUR_WRITES_SECONDS. The
+window travels with the client, so it holds whichever worker or instance
+serves the next read. The cookie carries an expiry signed with
+SECRET_KEY; a missing, expired or forged one just means the replica.
+
+Try it locally with two SQLite files:
+    cp hughigh.db hughigh_replica.db
+    DATABASE_URL=sqlite:///./hughigh.db DATABASE_REPLICA_URL=sqlite:///./hughigh_replica.db uvicorn main:app
+Reads then come from the copy until the same client writes.
+"""
+
+import hashlib
+import hmac
+import math
+import os
+import time
+from http.cookies import SimpleCookie
+
+from fastapi import Depends, Request
+from sqlalchemy.orm import Session
+
+from auth import SECRET_KEY
+from database import get_db, ReplicaSessionLocal, replica_engine
+from metrics import REGISTRY
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+DB_READS = REGISTRY.counter(
+    "hughigh_db_read_sessions_total",
+    "Sessions opened by read-only endpoints, by the database that served them.",
+    ("target",),
+)
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def _sign(until: int) -> str:
+    return hmac.new(SECRET_KEY.encode(), f"read-primary:{until}".encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def read_primary_marker() -> str:
+    """Cookie value keeping the client's reads on the primary for the read-your-writes window."""
+    until = math.ceil(time.time() + READ_YOUR_WRITES_SECONDS)
+    return f"{until}.{_sign(until)}"
+
+
+def reads_primary(marker: str | None) -> bool:
+    """True for an unexpired marker signed by this deployment."""
+    if not marker:
+        return False
+    until, _, signature = marker.partition(".")
+    if not until.isdigit() or not hmac.compare_digest(signature, _sign(int(until))):
+        return False
+    return int(until) > time.time()
+
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)):
+    """
+    Session for read-only endpoints: the replica, unless the client wrote recently.
+
+    Otherwise this is the request's primary session from `get_db` (shared
+    with get_current_user), so a request never holds two primary connections.
+    """
+    if replica_engine is None or reads_primary(request.cookies.get(READ_PRIMARY_COOKIE)):
+        DB_READS.inc("primary")
+        yield primary
+        return
+
+    db = ReplicaSessionLocal()
+    DB_READS.inc("replica")
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware setting the read-primary cookie on successful authenticated writes."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or replica_engine is None or scope["method"] in _SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        authenticated = any(
+            name == b"authorization" and value[:7].lower() == b"bearer "
+            for name, value in scope["headers"]
+        )
+        if not authenticated:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            # Set once the handler has committed, when the response starts;
+            # failed requests (including rejected tokens) get no marker
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie()
+                cookie[READ_PRIMARY_COOKIE] = read_primary_marker()
+                morsel = cookie[READ_PRIMARY_COOKIE]
+                morsel["max-age"] = math.ceil(READ_YOUR_WRITES_SECONDS)
+                morsel["path"] = "/"
+                morsel["httponly"] = True
+                # The frontend is served from another site
+                morsel["secure"] = True
+                morsel["samesite"] = "None"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", morsel.OutputString().encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
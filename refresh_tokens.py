@@ -0,0 +1,114 @@
+"""
+Rotating refresh tokens.
+
+Logins return a long-lived opaque refresh token next to the short-lived
+access token, so clients renew access tokens at POST /auth/refresh (one
+indexed lookup, no bcrypt or Google verification) instead of logging in
+again. Only the SHA-256 digest is stored: the tokens are random 256-bit
+values, so a slow password hash is not needed.
+
+Every refresh rotates the token: the presented one is marked used and a new
+one of the same family (the login it descends from) is returned. A used
+token presented again means it was copied, so the whole family is revoked
+and both holders must log in again. Reuse within REFRESH_TOKEN_REUSE_GRACE
+seconds is treated as two tabs refreshing at once and gets a sibling token
+instead.
+"""
+
+import hashlib
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import Session, joinedload
+
+from models import User, RefreshToken
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+REFRESH_TOKEN_REUSE_GRACE = float(os.getenv("REFRESH_TOKEN_REUSE_GRACE", "10"))
+PRUNE_CHUNK_SIZE = 1000
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db: Session, user: User, family_id: str = None) -> str:
+    """Add a new refresh token for `user` (a new family unless given) and return it. The caller commits."""
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    db.add(RefreshToken(
+        id=str(uuid.uuid4()),
+        user_id=user.id,
+        family_id=family_id or str(uuid.uuid4()),
+        token_hash=token_digest(token),
+        expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        created_at=now
+    ))
+    return token
+
+
+def revoke_family(db: Session, family_id: str):
+    """Revoke every token of a login session. The caller commits."""
+    db.execute(update(RefreshToken).where(
+        RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None)
+    ).values(revoked_at=datetime.utcnow()))
+
+
+def rotate_refresh_token(db: Session, token: str) -> tuple[User, str]:
+    """
+    Exchange a refresh token for its successor. Returns the user and the new
+    token; the caller commits (after reading the user, so it is not reloaded).
+
+    Raises 401 for unknown, expired or revoked tokens, for inactive users, and
+    on reuse (after revoking the family).
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    record = db.execute(
+        select(RefreshToken).options(joinedload(RefreshToken.user)).where(
+            RefreshToken.token_hash == token_digest(token)
+        )
+    ).scalar_one_or_none()
+    now = datetime.utcnow()
+    if record is None or record.revoked_at is not None or record.expires_at <= now:
+        raise invalid
+
+    if record.used_at is not None:
+        if (now - record.used_at).total_seconds() > REFRESH_TOKEN_REUSE_GRACE:
+            # Replayed: the token has been copied, log every holder out
+            revoke_family(db, record.family_id)
+            db.commit()
+            raise invalid
+    else:
+        record.used_at = now
+
+    user = record.user
+    if not user.is_active or user.deleted_at is not None:
+        revoke_family(db, record.family_id)
+        db.commit()
+        raise invalid
+
+    return user, issue_refresh_token(db, user, family_id=record.family_id)
+
+
+def prune_refresh_tokens(db: Session, chunk_size: int = PRUNE_CHUNK_SIZE) -> int:
+    """Delete expired refresh tokens in chunks. Returns the rows deleted."""
+    deleted = 0
+    now = datetime.utcnow()
+    while True:
+        ids = db.execute(
+            select(RefreshToken.id).where(RefreshToken.expires_at < now).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return deleted
+        db.execute(delete(RefreshToken).where(RefreshToken.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, date
 
 
 # User Schemas
@@ -45,6 +45,31 @@ class UserCreateGoogleRequest(BaseModel):
     class_name: Optional[str] = None  # Only for students
 
 
+class UserImportRow(BaseModel):
+    """One row of the admin CSV user import"""
+    email: EmailStr
+    name: str
+    role: int  # 0: Student, 1: Teacher, 2: Admin
+    class_name: Optional[str] = None  # Only for students
+    password: Optional[str] = None  # Empty for Google-only users
+
+
+class UserImportRowResult(BaseModel):
+    row: int  # 1-based data row number (header excluded)
+    email: Optional[str] = None
+    status: str  # "created", "duplicate" or "error"
+    user_id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class UserImportResponse(BaseModel):
+    total: int
+    created: int
+    duplicates: int
+    errors: int
+    results: list[UserImportRowResult]
+
+
 class UserUpdateRequest(BaseModel):
     """Schema for admin updating user information"""
     name: Optional[str] = None
@@ -53,6 +78,22 @@ class UserUpdateRequest(BaseModel):
     is_active: Optional[bool] = None
 
 
+class UserDeletionResponse(BaseModel):
+    """Progress of the background purge of a deleted user"""
+    user_id: str
+    deleted_at: datetime
+    remaining: dict[str, int]  # table -> rows still referencing the user
+    remaining_total: int
+
+
+class ActivityDailyCountResponse(BaseModel):
+    """Audit events of one action on one day (per class unless summed)"""
+    day: date
+    action: str
+    class_name: Optional[str] = None  # "" for users without a class; null when summed over classes
+    count: int
+
+
 class ProfileUpdateRequest(BaseModel):
     """Schema for user updating their own profile"""
     profile_image: Optional[str] = None  # Base64 encoded image
@@ -70,6 +111,21 @@ class LoginResponse(BaseModel):
     access_token: str
     token_type: str
     user: UserResponse
+    refresh_token: Optional[str] = None  # Exchange at POST /auth/refresh for a new access token
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class RefreshResponse(BaseModel):
+    access_token: str
+    token_type: str
+    refresh_token: str  # The presented token is spent; use this one next time
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None  # Revoked together with its rotation chain
 
 
 # Google OAuth Schemas
@@ -91,6 +147,8 @@ class TokenData(BaseModel):
     user_id: Optional[str] = None
     email: Optional[str] = None
     role: Optional[int] = None
+    class_name: Optional[str] = None
+    version: Optional[int] = None  # `ver` claim (users.token_version at issue time)
 
 
 # Audit Log Schemas
@@ -162,6 +220,119 @@ class QuestionnaireSubmit(BaseModel):
     answers: QuestionnaireAnswers
 
 
+class QuestionnaireTemplateResponse(BaseModel):
+    id: str
+    week: int
+    title: str
+    deadline: datetime
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class QuestionnaireTemplateUpdate(BaseModel):
+    title: Optional[str] = None
+    deadline: Optional[datetime] = None
+
+
+class QuestionnaireStatsResponse(BaseModel):
+    week: int
+    class_name: Optional[str] = None
+    completed: int  # Completed questionnaires
+    q1_average: Optional[float] = None
+    gratitude_rate: Optional[float] = None  # Share of completed with q2_hasGratitude
+    conduct_rate: Optional[float] = None  # Share of completed with q3_didConduct
+    extract_rate: Optional[float] = None  # q3_couldExtract among conducted interviews
+    receive_rate: Optional[float] = None  # Share of completed with q3_didReceive
+    speak_rate: Optional[float] = None  # q3_couldSpeak among received interviews
+
+
+class ClassWeekOverview(BaseModel):
+    week: int
+    issued: int  # Questionnaires issued to the class's students
+    completed: int
+    completion_rate: Optional[float] = None  # completed / issued
+    q1_average: Optional[float] = None
+
+
+class ClassMonthOverview(BaseModel):
+    year: int
+    month: int
+    results: int  # Students with a finalized result
+    level_average: float
+    skill_averages: dict[str, Optional[float]]
+
+
+class ClassOverviewResponse(BaseModel):
+    class_name: str
+    weeks: list[ClassWeekOverview]  # Newest week first
+    latest_month: Optional[ClassMonthOverview] = None  # Latest month any student finalized
+    generated_at: datetime  # When the (cached) overview was computed
+
+
+class SubmissionMatrixResponse(BaseModel):
+    """Students x weeks, columnar: status[i][j] is students[i] in weeks[j]"""
+    class_name: str
+    weeks: list[int]  # Issued weeks, ascending
+    deadlines: list[datetime]  # Deadline of each week
+    students: list[str]  # User ids
+    status: list[str]  # One character per week: c=completed, p=pending, o=overdue, -=not issued
+    submitted_at: list[list[Optional[datetime]]]  # Submission time of completed cells
+    generated_at: datetime
+
+
+class QuestionnaireSearchItem(BaseModel):
+    questionnaire_id: str
+    user_id: str
+    name: Optional[str] = None
+    class_name: Optional[str] = None
+    week: int
+    submitted_at: Optional[datetime] = None
+    snippet: str
+
+
+class QuestionnaireSearchResponse(BaseModel):
+    items: list[QuestionnaireSearchItem]
+    next_offset: Optional[int] = None  # Pass as `offset` to get the next page
+
+
+class QuestionnaireIssueRequest(BaseModel):
+    week: int
+    deadline: datetime
+    title: Optional[str] = None  # Defaults to "第N週 週次アンケート"
+    class_name: Optional[str] = None  # Only issue to this class (all students if omitted)
+
+
+class QuestionnaireIssueResponse(BaseModel):
+    week: int
+    class_name: Optional[str] = None
+    issued: int  # Newly created questionnaires
+
+
+# Gratitude Schemas
+class GratitudeReceivedItem(BaseModel):
+    id: int
+    from_user_id: str
+    from_name: Optional[str] = None
+    from_class_name: Optional[str] = None
+    week: int
+    message: Optional[str] = None
+    created_at: datetime
+
+
+class GratitudeReceivedResponse(BaseModel):
+    items: list[GratitudeReceivedItem]
+    next_cursor: Optional[int] = None  # Pass as `cursor` to get the next page
+
+
+class GratitudeInDegreeResponse(BaseModel):
+    user_id: str
+    name: Optional[str] = None
+    received: int
+
+
 # Monthly Result Schemas
 class MonthlyResultResponse(BaseModel):
     id: str
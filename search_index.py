@@ -0,0 +1,157 @@
+"""
+Full-text search over questionnaire free-text answers.
+
+`questionnaire_search` keeps one row per completed questionnaire with its
+free-text fields (interview notes, insights, challenges, gratitude
+messages) joined into `content`; it is refreshed on every submit/update.
+Japanese has no spaces between words, so the index uses character n-grams:
+
+  SQLite  FTS5 table with the trigram tokenizer, kept in sync by triggers
+          (migrations/0008), ranked with bm25()
+  MySQL   FULLTEXT index WITH PARSER ngram, ranked with MATCH ... AGAINST
+
+Queries with a term shorter than the n-gram size (3 characters for the
+SQLite trigram tokenizer, 2 for MySQL's default ngram_token_size) fall back
+to LIKE, ordered by submission time. Class and date filters are applied by joining
+questionnaires and users, so class changes never leave stale data in the
+index.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, text, and_, table, column
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+
+from models import User, Questionnaire, QuestionnaireTemplate, QuestionnaireSearch
+
+# Free-text answer fields that are indexed
+SEARCH_FIELDS = [
+    "q3_conductContent",
+    "q3_extractedInsight",
+    "q3_extractionChallenge",
+    "q3_receiveContent",
+    "q3_speakingInsight",
+    "q3_speakingChallenge",
+]
+
+# Shortest term the n-gram index can match, per dialect
+MIN_NGRAM = {"sqlite": 3, "mysql": 2}
+
+SNIPPET_RADIUS = 40
+
+# SQLite FTS5 shadow of questionnaire_search (created by migrations/0008)
+questionnaire_search_fts = table("questionnaire_search_fts", column("rowid"))
+
+
+def build_content(answers: Optional[dict]) -> str:
+    """The searchable text of one questionnaire's answers."""
+    answers = answers or {}
+    parts = [answers.get(field) for field in SEARCH_FIELDS]
+    parts += [target.get("message") for target in answers.get("q2_gratitudeTargets") or []]
+    if not answers.get("q2_gratitudeTargets"):
+        parts.append(answers.get("q2_message"))
+    return "\n".join(part.strip() for part in parts if isinstance(part, str) and part.strip())
+
+
+def index_questionnaire(db: Session, questionnaire: Questionnaire):
+    """Insert or refresh the questionnaire's search row. The caller commits."""
+    content = build_content(questionnaire.answers)
+    row = db.query(QuestionnaireSearch).filter(
+        QuestionnaireSearch.questionnaire_id == questionnaire.id
+    ).first()
+    if row:
+        row.content = content
+    else:
+        db.add(QuestionnaireSearch(questionnaire_id=questionnaire.id, content=content))
+
+
+def parse_terms(query: str) -> list[str]:
+    return [term for term in query.split() if term]
+
+
+def _fts5_query(terms: list[str]) -> str:
+    # Every term as a quoted phrase (AND), so user input is never FTS syntax
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _mysql_boolean_query(terms: list[str]) -> str:
+    return " ".join('+"' + term.replace('"', ' ') + '"' for term in terms)
+
+
+def snippet(content: str, terms: list[str]) -> str:
+    """A short excerpt of `content` around the first matching term."""
+    lowered = content.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    positions = [p for p in positions if p >= 0]
+    if not positions:
+        return content[:SNIPPET_RADIUS * 2]
+    start = max(0, min(positions) - SNIPPET_RADIUS)
+    end = min(len(content), min(positions) + SNIPPET_RADIUS)
+    return ("…" if start else "") + content[start:end].replace("\n", " ") + ("…" if end < len(content) else "")
+
+
+def search_questionnaires(
+    db: Session,
+    query: str,
+    class_name: str = None,
+    date_from: datetime = None,
+    date_to: datetime = None,
+    limit: int = 20,
+    offset: int = 0
+) -> list[dict]:
+    """
+    Ranked matches (best first) for every term in `query`.
+
+    `date_from` is inclusive and `date_to` exclusive, on submitted_at.
+    Returns up to `limit` dicts with questionnaire, student and snippet.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    use_index = dialect in MIN_NGRAM and all(len(term) >= MIN_NGRAM[dialect] for term in terms)
+
+    statement = select(
+        Questionnaire.id.label("questionnaire_id"), Questionnaire.user_id, User.name, User.class_name,
+        QuestionnaireTemplate.week, Questionnaire.submitted_at, QuestionnaireSearch.content
+    ).select_from(
+        QuestionnaireSearch
+    ).join(
+        Questionnaire, QuestionnaireSearch.questionnaire_id == Questionnaire.id
+    ).join(
+        User, Questionnaire.user_id == User.id
+    ).join(
+        QuestionnaireTemplate, Questionnaire.template_id == QuestionnaireTemplate.id
+    )
+
+    if use_index and dialect == "sqlite":
+        statement = statement.join(
+            questionnaire_search_fts, questionnaire_search_fts.c.rowid == QuestionnaireSearch.id
+        ).where(
+            text("questionnaire_search_fts MATCH :match").bindparams(match=_fts5_query(terms))
+        ).order_by(text("bm25(questionnaire_search_fts)"))
+    elif use_index and dialect == "mysql":
+        relevance = match(QuestionnaireSearch.content, against=_mysql_boolean_query(terms)).in_boolean_mode()
+        statement = statement.where(relevance).order_by(relevance.desc())
+    else:
+        statement = statement.where(and_(
+            *[QuestionnaireSearch.content.contains(term, autoescape=True) for term in terms]
+        ))
+
+    if class_name:
+        statement = statement.where(User.class_name == class_name)
+    if date_from:
+        statement = statement.where(Questionnaire.submitted_at >= date_from)
+    if date_to:
+        statement = statement.where(Questionnaire.submitted_at < date_to)
+    statement = statement.order_by(Questionnaire.submitted_at.desc()).limit(limit).offset(offset)
+
+    results = []
+    for row in db.execute(statement):
+        item = row._asdict()
+        item["snippet"] = snippet(item.pop("content"), terms)
+        results.append(item)
+    return results
@@ -11,16 +11,15 @@ This creates 5 test users:
 import sys
 import io
 import uuid
-from database import SessionLocal, engine, Base
+from database import SessionLocal
 from models import User, UserGoogleAccount
 from auth import get_password_hash
+from migrate import upgrade
 
 # Set UTF-8 encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
 
 def seed_database():
@@ -164,4 +163,6 @@ def seed_database():
 
 
 if __name__ == "__main__":
+    # Create / update tables
+    upgrade()
     seed_database()
@@ -5,7 +5,9 @@ Run this after creating users to add questionnaires.
 import uuid
 from datetime import datetime
 from database import SessionLocal
-from models import User, Questionnaire
+from models import User, Questionnaire, QuestionnaireSearch, GratitudeEdge
+from questionnaire_scheduler import get_or_create_template
+from search_index import index_questionnaire
 
 def seed_questionnaires():
     db = SessionLocal()
@@ -20,7 +22,14 @@ def seed_questionnaires():
 
         print(f"Creating questionnaires for student: {student.email}")
 
-        # Delete existing questionnaires for this student
+        # Delete existing questionnaires for this student (and rows that reference them)
+        existing_ids = db.query(Questionnaire.id).filter(Questionnaire.user_id == student.id)
+        db.query(QuestionnaireSearch).filter(
+            QuestionnaireSearch.questionnaire_id.in_(existing_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+        db.query(GratitudeEdge).filter(
+            GratitudeEdge.questionnaire_id.in_(existing_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
         db.query(Questionnaire).filter(Questionnaire.user_id == student.id).delete()
         db.commit()
 
@@ -334,16 +343,18 @@ def seed_questionnaires():
         ]
 
         for data in questionnaires_data:
+            # Week, title and deadline are shared by every student through the template
+            template = get_or_create_template(db, data["week"], data["title"], data["deadline"])
             questionnaire = Questionnaire(
                 id=str(uuid.uuid4()),
                 user_id=student.id,
-                week=data["week"],
-                title=data["title"],
-                deadline=data["deadline"],
+                template_id=template.id,
                 status=data["status"],
-                answers=data["answers"],
                 submitted_at=data["submitted_at"]
             )
+            questionnaire.set_answers(data["answers"])
+            if data["status"] == "completed":
+                index_questionnaire(db, questionnaire)
             # Manually set created_at to specific date
             questionnaire.created_at = data["created_at"]
             db.add(questionnaire)
@@ -4,6 +4,7 @@ Show all data in the database
 
 import sys
 import io
+from sqlalchemy.orm import joinedload
 from database import SessionLocal
 from models import User, UserGoogleAccount, AuditLog
 
@@ -37,7 +38,7 @@ for idx, user in enumerate(users, 1):
 # ========== Google アカウント ==========
 print("\n【Google アカウント（UserGoogleAccount）テーブル】")
 print("-" * 70)
-google_accounts = db.query(UserGoogleAccount).all()
+google_accounts = db.query(UserGoogleAccount).options(joinedload(UserGoogleAccount.user)).all()
 print(f"合計: {len(google_accounts)}件\n")
 
 if google_accounts:
@@ -54,12 +55,14 @@ else:
 # ========== 監査ログ ==========
 print("\n【監査ログ（AuditLog）テーブル】")
 print("-" * 70)
-audit_logs = db.query(AuditLog).all()
-print(f"合計: {len(audit_logs)}件\n")
+audit_log_count = db.query(AuditLog).count()
+print(f"合計: {audit_log_count}件\n")
 
-if audit_logs:
-    # 最新20件を表示
-    recent_logs = audit_logs[-20:] if len(audit_logs) > 20 else audit_logs
+if audit_log_count:
+    # 最新20件を表示（ユーザーはまとめて取得）
+    recent_logs = db.query(AuditLog).options(joinedload(AuditLog.user)).order_by(
+        AuditLog.id.desc()
+    ).limit(20).all()[::-1]
     for idx, log in enumerate(recent_logs, 1):
         user = log.user
         print(f"{idx}. {log.timestamp} - {user.email if user else '(ユーザー削除済み)'}")
@@ -22,6 +22,10 @@ if not exist app.db (
     python seed_data.py
 )
 
+REM Apply pending schema migrations
+echo Applying database migrations...
+python migrate.py
+
 REM Start the server
 echo.
 echo =====================================
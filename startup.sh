@@ -0,0 +1,11 @@
+#!/bin/sh
+# Azure App Service startup command: sh startup.sh
+# Migrations run once per instance start, before any worker is forked.
+set -e
+
+python migrate.py upgrade
+
+exec python -m uvicorn main:app \
+    --host 0.0.0.0 \
+    --port "${PORT:-8000}" \
+    --workers "${WEB_CONCURRENCY:-2}"
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 import uuid
 
 from database import get_db
+from read_replica import get_read_db
 from models import User, TalentResult
 from schemas import TalentResultResponse, TalentResultCreate
 from auth import get_current_user
@@ -13,7 +14,7 @@ router = APIRouter(prefix="/talent-result", tags=["talent-result"])
 @router.get("", response_model=TalentResultResponse | None)
 def get_talent_result(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get the talent result for the current user."""
     result = db.query(TalentResult).filter(
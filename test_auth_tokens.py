@@ -0,0 +1,81 @@
+"""
+Refresh token rotation, through TestClient on SQLite.
+
+Covers refresh_tokens.py: rotation, reuse within and after
+REFRESH_TOKEN_REUSE_GRACE, family revocation on replay and on logout.
+
+Run with:
+    python -m pytest -q test_auth_tokens.py
+"""
+
+import refresh_tokens
+from auth import access_token_claims, create_access_token
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _refresh(client, token: str):
+    return client.post("/auth/refresh", json={"refresh_token": token})
+
+
+def test_refresh_rotates_token(client, login, student):
+    tokens = login(student)
+
+    response = _refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200
+    body = response.json()
+    assert body["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/auth/me", headers=_bearer(body["access_token"])).status_code == 200
+
+    # The successor rotates in turn
+    assert _refresh(client, body["refresh_token"]).status_code == 200
+
+
+def test_reuse_within_grace_gets_sibling(client, login, student):
+    tokens = login(student)
+
+    first = _refresh(client, tokens["refresh_token"])
+    second = _refresh(client, tokens["refresh_token"])  # Two tabs refreshing at once
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.json()["refresh_token"] != second.json()["refresh_token"]
+
+
+def test_reuse_after_grace_revokes_family(client, login, student, monkeypatch):
+    monkeypatch.setattr(refresh_tokens, "REFRESH_TOKEN_REUSE_GRACE", -1)
+    tokens = login(student)
+
+    successor = _refresh(client, tokens["refresh_token"]).json()["refresh_token"]
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401  # Replayed
+    # Every token of the login is gone, the legitimate successor too
+    assert _refresh(client, successor).status_code == 401
+
+    # Another login is a separate family
+    assert _refresh(client, login(student)["refresh_token"]).status_code == 200
+
+
+def test_logout_revokes_family(client, login, student):
+    tokens = login(student)
+    successor = _refresh(client, tokens["refresh_token"]).json()["refresh_token"]
+
+    response = client.post(
+        "/auth/logout", headers=_bearer(tokens["access_token"]), json={"refresh_token": successor}
+    )
+    assert response.status_code == 200
+    assert _refresh(client, successor).status_code == 401
+    # Logout without a body still works
+    assert client.post("/auth/logout", headers=_bearer(tokens["access_token"])).status_code == 200
+
+
+def test_unknown_refresh_token(client):
+    assert _refresh(client, "not-a-token").status_code == 401
+
+
+def test_refresh_rejected_for_deleted_user(client, login, admin, student):
+    tokens = login(student)
+    admin_token = create_access_token(access_token_claims(admin))
+    assert client.delete(f"/admin/users/{student.id}", headers=_bearer(admin_token)).status_code == 200
+
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
@@ -0,0 +1,90 @@
+"""
+Per-class teacher views, through TestClient on SQLite.
+
+Covers GET /classes/{class_name}/submission-matrix: the roster includes
+students without questionnaires, cell codes, and ETag revalidation.
+
+Run with:
+    python -m pytest -q test_class_routes.py
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from auth import access_token_claims, create_access_token
+from class_routes import invalidate_all_classes
+from models import Questionnaire, QuestionnaireTemplate
+
+
+def _bearer(user) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(access_token_claims(user))}"}
+
+
+@pytest.fixture
+def class_name():
+    invalidate_all_classes()
+    return f"T-{uuid.uuid4().hex[:8]}"
+
+
+def _add_week(db, deadline: datetime) -> QuestionnaireTemplate:
+    # `week` is unique across the shared test database
+    template = QuestionnaireTemplate(
+        id=str(uuid.uuid4()), week=uuid.uuid4().int % 10**9, title="Test week", deadline=deadline
+    )
+    db.add(template)
+    db.commit()
+    return template
+
+
+def _issue(db, user, template, submitted_at: datetime = None):
+    db.add(Questionnaire(
+        id=str(uuid.uuid4()),
+        user_id=user.id,
+        template_id=template.id,
+        status="completed" if submitted_at else "pending",
+        submitted_at=submitted_at,
+    ))
+    db.commit()
+
+
+def test_matrix_lists_students_without_questionnaires(client, db, add_user, admin, class_name):
+    past = _add_week(db, datetime.utcnow() - timedelta(days=1))
+    future = _add_week(db, datetime.utcnow() + timedelta(days=7))
+    active = add_user(role=0, class_name=class_name)
+    newcomer = add_user(role=0, class_name=class_name)  # Nothing issued yet
+    add_user(role=0, class_name="other")
+    _issue(db, active, past, submitted_at=datetime.utcnow() - timedelta(days=2))
+    _issue(db, active, future)
+
+    response = client.get(f"/classes/{class_name}/submission-matrix", headers=_bearer(admin))
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["students"] == sorted([active.id, newcomer.id])
+    assert body["weeks"] == sorted([past.week, future.week])
+    rows = dict(zip(body["students"], body["status"]))
+    past_first = past.week < future.week
+    assert rows[active.id] == ("cp" if past_first else "pc")
+    assert rows[newcomer.id] == "--"
+
+
+def test_matrix_of_class_without_questionnaires(client, add_user, admin, class_name):
+    student = add_user(role=0, class_name=class_name)
+
+    body = client.get(f"/classes/{class_name}/submission-matrix", headers=_bearer(admin)).json()
+    assert body["students"] == [student.id]
+    assert body["weeks"] == []
+    assert body["status"] == [""]
+
+
+def test_matrix_etag(client, add_user, admin, student, class_name):
+    add_user(role=0, class_name=class_name)
+    url = f"/classes/{class_name}/submission-matrix"
+
+    etag = client.get(url, headers=_bearer(admin)).headers["etag"]
+    response = client.get(url, headers={**_bearer(admin), "If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
+
+    assert client.get(url, headers=_bearer(student)).status_code == 403
@@ -0,0 +1,132 @@
+"""
+Access token versions and stateless authorization, through TestClient on SQLite.
+
+Covers the token version checks of auth.get_current_user (stale `ver`
+after update_user / delete_user, changes written by another instance, DB
+fallback for tokens without `ver`) in both stateful and AUTH_STATELESS
+mode, and auth.get_current_db_user, which always reads the DB.
+
+Run with:
+    python -m pytest -q test_token_versions.py
+"""
+
+import pytest
+
+import auth
+from auth import AUTH_USER_LOOKUPS, access_token_claims, create_access_token
+from models import User
+from token_versions import token_versions
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(params=[False, True], ids=["stateful", "stateless"])
+def stateless(request, monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_STATELESS", request.param)
+    # No state carried over between tests
+    auth._token_cache.clear()
+    token_versions._entries.clear()
+    token_versions._refreshed_at = 0.0
+    token_versions._changed_since = None
+    return request.param
+
+
+def test_role_change_rejects_old_token(client, login, stateless, admin, student):
+    admin_token = create_access_token(access_token_claims(admin))
+    old_token = login(student)["access_token"]
+    assert client.get("/questionnaires", headers=_bearer(old_token)).status_code == 200
+
+    response = client.put(f"/admin/users/{student.id}", headers=_bearer(admin_token), json={"role": 1})
+    assert response.status_code == 200
+
+    if stateless:
+        # The role carried by the token is stale: rejected until the user logs in again
+        assert client.get("/questionnaires", headers=_bearer(old_token)).status_code == 401
+    else:
+        # Loaded from the DB: the token keeps working with the new role
+        assert client.get("/questionnaires", headers=_bearer(old_token)).status_code == 200
+    new_token = login(student)["access_token"]
+    assert client.get("/questionnaires", headers=_bearer(new_token)).status_code == 200
+
+
+def test_name_change_keeps_token(client, login, stateless, admin, student):
+    admin_token = create_access_token(access_token_claims(admin))
+    token = login(student)["access_token"]
+
+    response = client.put(f"/admin/users/{student.id}", headers=_bearer(admin_token), json={"name": "Renamed"})
+    assert response.status_code == 200
+    assert client.get("/questionnaires", headers=_bearer(token)).status_code == 200
+
+
+def test_deactivation_and_deletion_reject_token(client, login, stateless, add_user, admin):
+    admin_token = create_access_token(access_token_claims(admin))
+    deactivated = add_user(role=0, class_name="1-A")
+    deleted = add_user(role=0, class_name="1-A")
+    deactivated_token = login(deactivated)["access_token"]
+    deleted_token = login(deleted)["access_token"]
+
+    client.put(f"/admin/users/{deactivated.id}", headers=_bearer(admin_token), json={"is_active": False})
+    client.delete(f"/admin/users/{deleted.id}", headers=_bearer(admin_token))
+
+    for token in (deactivated_token, deleted_token):
+        assert client.get("/questionnaires", headers=_bearer(token)).status_code in (400, 401)
+
+
+def test_change_from_another_instance_applies_after_refresh(client, login, stateless, db, student):
+    token = login(student)["access_token"]
+    assert client.get("/questionnaires", headers=_bearer(token)).status_code == 200
+
+    # Written by another process: this one only learns it from the DB
+    user = db.get(User, student.id)
+    user.role = 1
+    user.token_version += 1
+    db.commit()
+    token_versions._refreshed_at = 0.0  # The refresh interval has passed
+
+    expected = 401 if stateless else 200
+    assert client.get("/questionnaires", headers=_bearer(token)).status_code == expected
+
+
+def test_token_without_version_uses_db(client, stateless, db, student):
+    # Issued before tokens carried `ver`
+    legacy = create_access_token({"sub": student.id, "email": student.email, "role": student.role})
+    assert client.get("/questionnaires", headers=_bearer(legacy)).status_code == 200
+
+    user = db.get(User, student.id)
+    user.is_active = False
+    db.commit()
+    assert client.get("/questionnaires", headers=_bearer(legacy)).status_code == 400
+
+
+def test_stateless_requests_skip_the_db(client, login, stateless, student):
+    token = login(student)["access_token"]
+    client.get("/questionnaires", headers=_bearer(token))  # First sight: loads the version
+
+    before = AUTH_USER_LOOKUPS.value("db")
+    assert client.get("/questionnaires", headers=_bearer(token)).status_code == 200
+    assert AUTH_USER_LOOKUPS.value("db") - before == (0 if stateless else 1)
+
+
+def test_profile_reads_db(client, login, stateless, db, student):
+    token = login(student)["access_token"]
+    client.get("/questionnaires", headers=_bearer(token))
+
+    # Name changes do not bump the version, so the token stays valid...
+    user = db.get(User, student.id)
+    user.name = "Renamed"
+    db.commit()
+
+    # ...and /auth/me shows the current DB row, not the token claims
+    response = client.get("/auth/me", headers=_bearer(token))
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+
+
+def test_profile_rejects_deleted_user(client, login, stateless, admin, student):
+    admin_token = create_access_token(access_token_claims(admin))
+    token = login(student)["access_token"]
+    assert client.delete(f"/admin/users/{student.id}", headers=_bearer(admin_token)).status_code == 200
+
+    assert client.get("/auth/me", headers=_bearer(token)).status_code in (400, 401)
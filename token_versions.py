@@ -0,0 +1,89 @@
+"""
+In-memory user token versions for stateless authorization (AUTH_STATELESS).
+
+In stateless mode get_current_user trusts the role and class carried by the
+access token instead of loading the user on every request. What it still
+has to know is whether the token has been superseded: every user has a
+`token_version`, copied into tokens as the `ver` claim and bumped by the
+admin update_user/delete_user endpoints. This table maps user id ->
+(token_version, is_active) and is
+
+  - loaded once in full, then refreshed incrementally (users changed since
+    the last refresh, by updated_at) every AUTH_VERSION_REFRESH_SECONDS,
+  - updated immediately in the process that made the change.
+
+So a role change or deactivation takes effect at once on the instance that
+handled it and within AUTH_VERSION_REFRESH_SECONDS everywhere else. Users
+not in the table yet (created on another instance since the last refresh)
+are looked up in the DB by the caller.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from models import User
+
+logger = logging.getLogger(__name__)
+
+AUTH_VERSION_REFRESH_SECONDS = float(os.getenv("AUTH_VERSION_REFRESH_SECONDS", "30"))
+
+
+class TokenVersionTable:
+    def __init__(self, refresh_seconds: float = AUTH_VERSION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._entries: dict[str, tuple[int, bool]] = {}
+        self._refreshed_at = 0.0  # time.monotonic() of the last refresh
+        self._changed_since = None  # users.updated_at watermark for the next refresh
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def get(self, user_id: str) -> tuple[int, bool] | None:
+        """(token_version, is_active) for the user, or None if unknown."""
+        if time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+            self.refresh()
+        return self._entries.get(user_id)
+
+    def set(self, user_id: str, token_version: int, is_active: bool):
+        with self._lock:
+            self._entries[user_id] = (token_version, is_active)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def refresh(self):
+        """Reload users changed since the last refresh (all of them the first time)."""
+        # One thread refreshes; the others keep using the current entries
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            from database import SessionLocal
+
+            started = datetime.utcnow()
+            statement = select(User.id, User.token_version, User.is_active)
+            if self._changed_since is not None:
+                statement = statement.where(User.updated_at >= self._changed_since)
+            db = SessionLocal()
+            try:
+                rows = db.execute(statement).all()
+            finally:
+                db.close()
+            with self._lock:
+                for user_id, token_version, is_active in rows:
+                    self._entries[user_id] = (token_version, is_active)
+            # Overlap by one interval so writes committed during this refresh are not missed
+            self._changed_since = started - timedelta(seconds=self.refresh_seconds)
+            self._refreshed_at = time.monotonic()
+        except Exception as e:
+            logger.warning("Token version refresh failed: %s", e)
+            # Retry at the next interval rather than on every request
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+
+token_versions = TokenVersionTable()
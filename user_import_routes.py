@@ -0,0 +1,210 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File
+from sqlalchemy import insert, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from concurrent.futures import ThreadPoolExecutor
+import codecs
+import csv
+import os
+import uuid
+
+from database import get_db
+from models import User
+from schemas import UserImportRow, UserImportRowResult, UserImportResponse
+from auth import get_current_user, get_password_hash
+from audit import create_audit_log
+
+router = APIRouter(prefix="/admin/users", tags=["admin"])
+
+USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", "10000"))
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", "500"))
+# bcrypt releases the GIL, so a thread pool hashes on all cores
+USER_IMPORT_HASH_WORKERS = int(os.getenv("USER_IMPORT_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Chunk size for the duplicate-email lookup (keeps the IN list within driver limits)
+EMAIL_LOOKUP_CHUNK = 1000
+
+
+def _find_existing_emails(db: Session, emails: list[str]) -> set[str]:
+    """
+    Return the subset of `emails` (lower-cased) already registered, with
+    set-based IN queries. Compared case-insensitively whatever the collation.
+    """
+    existing = set()
+    for start in range(0, len(emails), EMAIL_LOOKUP_CHUNK):
+        chunk = [email.lower() for email in emails[start:start + EMAIL_LOOKUP_CHUNK]]
+        existing.update(
+            email for (email,) in db.query(func.lower(User.email)).filter(func.lower(User.email).in_(chunk))
+        )
+    return existing
+
+
+def _insert_batch(db: Session, rows: list[dict], results: dict[int, UserImportRowResult]):
+    """Bulk insert one batch; on a conflict, retry the batch row by row."""
+    try:
+        db.execute(insert(User), [row["values"] for row in rows])
+        db.commit()
+        for row in rows:
+            results[row["row"]].status = "created"
+            results[row["row"]].user_id = row["values"]["id"]
+        return
+    except IntegrityError:
+        db.rollback()
+
+    # Someone registered one of these emails since the duplicate check
+    for row in rows:
+        try:
+            db.execute(insert(User), [row["values"]])
+            db.commit()
+            results[row["row"]].status = "created"
+            results[row["row"]].user_id = row["values"]["id"]
+        except IntegrityError:
+            db.rollback()
+            results[row["row"]].status = "duplicate"
+            results[row["row"]].detail = "User with this email already exists"
+
+
+@router.post("/import", response_model=UserImportResponse)
+def import_users(
+    request: Request,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Admin-only endpoint to create users in bulk from a CSV file.
+
+    - Only Admin (role=2) can access this endpoint
+    - CSV header: email,name,role,class_name,password (password empty for Google-only users)
+    - Every row is validated; duplicates are checked with one set-based query
+    - Passwords are hashed in parallel and users are inserted in batches
+    - Returns a per-row result report
+    """
+    # Check if current user is admin
+    if current_user.role != 2:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can create users"
+        )
+
+    # Stream-parse the upload (utf-8-sig strips the BOM Excel adds)
+    reader = csv.DictReader(codecs.iterdecode(file.file, "utf-8-sig"))
+    required = {"email", "name", "role"}
+    if not reader.fieldnames or not required.issubset(reader.fieldnames):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV header must contain: email, name, role (optional: class_name, password)"
+        )
+
+    results: dict[int, UserImportRowResult] = {}
+    valid: list[tuple[int, UserImportRow]] = []
+    seen_emails = set()
+
+    try:
+        for row_number, raw in enumerate(reader, start=1):
+            if row_number > USER_IMPORT_MAX_ROWS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Too many rows (max {USER_IMPORT_MAX_ROWS})"
+                )
+
+            # Normalised once here: the duplicate checks and the stored email all use it
+            email = (raw.get("email") or "").strip().lower()
+            try:
+                row = UserImportRow(
+                    email=email,
+                    name=(raw.get("name") or "").strip(),
+                    role=(raw.get("role") or "").strip(),
+                    class_name=(raw.get("class_name") or "").strip() or None,
+                    password=raw.get("password") or None,
+                )
+            except ValidationError as e:
+                error = e.errors()[0]
+                results[row_number] = UserImportRowResult(
+                    row=row_number, email=email or None, status="error",
+                    detail=f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                )
+                continue
+
+            if row.role not in [0, 1, 2]:
+                results[row_number] = UserImportRowResult(
+                    row=row_number, email=row.email, status="error",
+                    detail="Invalid role. Must be 0 (Student), 1 (Teacher), or 2 (Admin)"
+                )
+                continue
+            if not row.name:
+                results[row_number] = UserImportRowResult(
+                    row=row_number, email=row.email, status="error", detail="name: Field required"
+                )
+                continue
+
+            email_key = row.email.lower()
+            if email_key in seen_emails:
+                results[row_number] = UserImportRowResult(
+                    row=row_number, email=row.email, status="duplicate",
+                    detail="Email appears more than once in the file"
+                )
+                continue
+            seen_emails.add(email_key)
+
+            results[row_number] = UserImportRowResult(row=row_number, email=row.email, status="pending")
+            valid.append((row_number, row))
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV must be UTF-8 encoded"
+        )
+
+    # One set-based duplicate check against the database
+    existing = _find_existing_emails(db, [row.email for _, row in valid])
+    to_create = []
+    for row_number, row in valid:
+        if row.email.lower() in existing:
+            results[row_number].status = "duplicate"
+            results[row_number].detail = "User with this email already exists"
+        else:
+            to_create.append((row_number, row))
+
+    # Hash passwords in parallel (Google-only users have none)
+    passwords = [row.password for _, row in to_create if row.password]
+    with ThreadPoolExecutor(max_workers=max(1, USER_IMPORT_HASH_WORKERS)) as pool:
+        hashes = iter(list(pool.map(get_password_hash, passwords)))
+
+    pending = [
+        {
+            "row": row_number,
+            "values": {
+                "id": str(uuid.uuid4()),
+                "email": row.email,
+                "hashed_password": next(hashes) if row.password else None,
+                "name": row.name,
+                "class_name": row.class_name if row.role == 0 else None,
+                "role": row.role,
+                "is_active": True,
+            },
+        }
+        for row_number, row in to_create
+    ]
+
+    # Batched bulk inserts
+    for start in range(0, len(pending), USER_IMPORT_BATCH_SIZE):
+        _insert_batch(db, pending[start:start + USER_IMPORT_BATCH_SIZE], results)
+
+    ordered = [results[n] for n in sorted(results)]
+    created = sum(1 for r in ordered if r.status == "created")
+
+    # Log the action once for the whole import
+    create_audit_log(
+        db,
+        current_user.id,
+        f"import_users:{created}",
+        request.client.host if request.client else None
+    )
+
+    return UserImportResponse(
+        total=len(ordered),
+        created=created,
+        duplicates=sum(1 for r in ordered if r.status == "duplicate"),
+        errors=sum(1 for r in ordered if r.status == "error"),
+        results=ordered
+    )
@@ -0,0 +1,234 @@
+"""
+Background purge of soft-deleted users.
+
+`DELETE /admin/users/{id}` only marks the user inactive and sets
+`deleted_at`, so the request returns at once and the user can no longer log
+in. The rows that reference the user - search index entries, gratitude
+sent or received, questionnaires, monthly and talent results, audit logs,
+refresh tokens and the Google link - are then removed here in bounded
+chunks, each committed on its own with a short pause in between, so a
+student with years of history never holds long locks. The user row goes
+last. Each pass also prunes expired refresh tokens.
+
+The purger runs in a background thread started from the app lifespan; it
+is woken right after a deletion and otherwise re-scans every
+USER_PURGE_INTERVAL seconds, so deletions interrupted by a restart are
+picked up again. Progress is derived from the rows still remaining.
+
+Every worker of every instance starts a purger, so each pass first takes
+a named lock (GET_LOCK on MySQL, like migrate.py) and is skipped when
+another process holds it. SQLite has no named locks; there concurrent
+passes are harmless (each chunk's delete only counts the rows it removed).
+
+Usage (one-off or from cron, e.g. with USER_PURGE_ENABLED=false):
+    python user_purge.py
+    python user_purge.py --user-id <id> --chunk-size 200 --pause 0.2
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import select, delete, func, or_, text
+from sqlalchemy.orm import Session
+
+from models import (
+    User, UserGoogleAccount, AuditLog, Questionnaire, QuestionnaireSearch,
+    GratitudeEdge, MonthlyResult, TalentResult, RefreshToken
+)
+from refresh_tokens import prune_refresh_tokens
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PURGE_ENABLED = os.getenv("USER_PURGE_ENABLED", "true").lower() in ("1", "true", "yes")
+PURGE_CHUNK_SIZE = int(os.getenv("USER_PURGE_CHUNK_SIZE", "500"))
+PURGE_PAUSE = float(os.getenv("USER_PURGE_PAUSE", "0.05"))
+PURGE_INTERVAL = float(os.getenv("USER_PURGE_INTERVAL", "300"))
+LOCK_NAME = "hughigh_user_purge"
+
+PURGED_ROWS = REGISTRY.counter(
+    "hughigh_user_purge_rows_total",
+    "Rows removed by the soft-deleted user purger.",
+    ("table",),
+)
+
+_wake = threading.Event()
+_stop = threading.Event()
+_thread = None
+
+
+def purge_steps(user_id: str) -> list[tuple]:
+    """(model, condition) for every table referencing the user, children first."""
+    questionnaire_ids = select(Questionnaire.id).where(Questionnaire.user_id == user_id)
+    return [
+        (QuestionnaireSearch, QuestionnaireSearch.questionnaire_id.in_(questionnaire_ids)),
+        (GratitudeEdge, or_(GratitudeEdge.from_user_id == user_id, GratitudeEdge.to_user_id == user_id)),
+        (Questionnaire, Questionnaire.user_id == user_id),
+        (MonthlyResult, MonthlyResult.user_id == user_id),
+        (TalentResult, TalentResult.user_id == user_id),
+        (AuditLog, AuditLog.user_id == user_id),
+        (RefreshToken, RefreshToken.user_id == user_id),
+        (UserGoogleAccount, UserGoogleAccount.user_id == user_id),
+    ]
+
+
+def remaining_rows(db: Session, user_id: str) -> dict[str, int]:
+    """Rows per table still referencing the user."""
+    return {
+        model.__tablename__: db.execute(select(func.count()).select_from(model).where(condition)).scalar()
+        for model, condition in purge_steps(user_id)
+    }
+
+
+def purge_user(db: Session, user_id: str, chunk_size: int = None, pause: float = None) -> int:
+    """
+    Delete everything referencing a soft-deleted user, then the user.
+
+    Deletes at most `chunk_size` rows per statement and commits after each,
+    sleeping `pause` seconds in between. Stops early (leaving the rest for
+    the next pass) once stop_purger() is called. Safe to re-run after an
+    interruption. Returns the number of rows removed.
+    """
+    chunk_size = chunk_size or PURGE_CHUNK_SIZE
+    pause = PURGE_PAUSE if pause is None else pause
+
+    purged = 0
+    for model, condition in purge_steps(user_id):
+        while True:
+            if _stop.is_set():
+                return purged
+            ids = db.execute(select(model.id).where(condition).limit(chunk_size)).scalars().all()
+            if not ids:
+                break
+            # rowcount, not len(ids): a concurrent pass may have deleted some of them
+            deleted = db.execute(delete(model).where(model.id.in_(ids))).rowcount
+            db.commit()
+            if deleted:
+                purged += deleted
+                PURGED_ROWS.inc(model.__tablename__, amount=deleted)
+            if pause:
+                time.sleep(pause)
+
+    deleted = db.execute(delete(User).where(User.id == user_id, User.deleted_at.isnot(None)))
+    db.commit()
+    if deleted.rowcount:
+        purged += deleted.rowcount
+        PURGED_ROWS.inc(User.__tablename__, amount=deleted.rowcount)
+    return purged
+
+
+def purge_deleted_users(db: Session, chunk_size: int = None, pause: float = None) -> int:
+    """Purge every soft-deleted user, oldest deletion first. Returns the users purged."""
+    user_ids = db.execute(
+        select(User.id).where(User.deleted_at.isnot(None)).order_by(User.deleted_at)
+    ).scalars().all()
+    for user_id in user_ids:
+        if _stop.is_set():
+            break
+        rows = purge_user(db, user_id, chunk_size=chunk_size, pause=pause)
+        logger.info("Purged deleted user %s (%d rows)", user_id, rows)
+    return len(user_ids)
+
+
+@contextmanager
+def purge_lock(engine):
+    """
+    Yield whether this process may run a purge pass: holds a MySQL named
+    lock on its own connection for the pass (always True elsewhere).
+    """
+    if engine.dialect.name != "mysql":
+        yield True
+        return
+    with engine.connect() as conn:
+        got_lock = conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": LOCK_NAME}).scalar() == 1
+        try:
+            yield got_lock
+        finally:
+            if got_lock:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+                conn.commit()
+
+
+def _run():
+    from database import SessionLocal, engine
+
+    while not _stop.is_set():
+        _wake.clear()
+        db = SessionLocal()
+        try:
+            with purge_lock(engine) as got_lock:
+                if got_lock:
+                    purge_deleted_users(db)
+                    # Expired refresh tokens are housekept on the same schedule
+                    prune_refresh_tokens(db)
+        except Exception as e:
+            logger.warning("User purge failed: %s", e)
+            db.rollback()
+        finally:
+            db.close()
+        _wake.wait(PURGE_INTERVAL)
+
+
+def start_purger() -> threading.Thread | None:
+    """Start the background purger (no-op when disabled or already running)."""
+    global _thread
+    if not PURGE_ENABLED or (_thread and _thread.is_alive()):
+        return None
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="user-purge", daemon=True)
+    _thread.start()
+    return _thread
+
+
+def stop_purger():
+    """Ask the purger to stop before its next chunk."""
+    _stop.set()
+    _wake.set()
+
+
+def request_purge():
+    """Wake the purger now instead of at its next interval."""
+    _wake.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge soft-deleted users and their data")
+    parser.add_argument("--user-id", help="Only purge this (soft-deleted) user")
+    parser.add_argument("--chunk-size", type=int, default=PURGE_CHUNK_SIZE)
+    parser.add_argument("--pause", type=float, default=PURGE_PAUSE, help="Seconds to sleep between chunks")
+    args = parser.parse_args()
+
+    from database import SessionLocal, engine
+
+    db = SessionLocal()
+    try:
+        with purge_lock(engine) as got_lock:
+            if not got_lock:
+                print("✗ Another process is purging deleted users, try again later")
+                sys.exit(1)
+            if args.user_id:
+                user = db.query(User).filter(User.id == args.user_id).first()
+                if not user or user.deleted_at is None:
+                    print(f"✗ User {args.user_id} is not marked as deleted")
+                    sys.exit(1)
+                rows = purge_user(db, args.user_id, chunk_size=args.chunk_size, pause=args.pause)
+                print(f"✓ Purged user {args.user_id} ({rows} rows)")
+            else:
+                users = purge_deleted_users(db, chunk_size=args.chunk_size, pause=args.pause)
+                print(f"✓ Purged {users} deleted user(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    main()
@@ -0,0 +1,129 @@
+"""
+Startup warm-up and readiness.
+
+Right after a deploy or scale-out the first requests would otherwise pay for
+opening DB connections, loading bcrypt, downloading Google's certificates
+and building the OpenAI client. `start_warmup()` (called from the app
+lifespan) runs those steps in a background thread; `/health/ready` reports
+503 until they have finished, while `/health` (liveness) answers at once.
+Point the load balancer / App Service health check at /health/ready.
+
+Steps are best-effort: a failing step is reported but does not keep the
+instance out of rotation forever. Other modules can add steps with
+`@warmup_step("name")`.
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "2"))
+
+_steps = []
+_state = {"ready": False, "started_at": None, "finished_at": None, "steps": {}}
+_state_lock = threading.Lock()
+
+
+def warmup_step(name: str):
+    """Register a function to run during warm-up."""
+    def decorator(func):
+        _steps.append((name, func))
+        return func
+    return decorator
+
+
+def run_warmup():
+    """Run every registered step, recording duration and outcome, then mark ready."""
+    with _state_lock:
+        _state["started_at"] = time.time()
+    for name, func in _steps:
+        started = time.perf_counter()
+        try:
+            detail = func()
+            result = {"ok": True}
+            if detail is not None:
+                result["detail"] = detail
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            result = {"ok": False, "error": str(e)}
+        result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        with _state_lock:
+            _state["steps"][name] = result
+    with _state_lock:
+        _state["finished_at"] = time.time()
+        _state["ready"] = True
+
+
+def start_warmup() -> threading.Thread | None:
+    """Kick off warm-up in the background (or mark ready at once if disabled)."""
+    if not WARMUP_ENABLED:
+        with _state_lock:
+            _state["ready"] = True
+        return None
+    thread = threading.Thread(target=run_warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    return _state["ready"]
+
+
+def readiness_report() -> dict:
+    with _state_lock:
+        return {
+            "status": "ready" if _state["ready"] else "warming_up",
+            "steps": dict(_state["steps"]),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Built-in steps
+# ---------------------------------------------------------------------------
+
+@warmup_step("db_pool")
+def _warm_db_pool():
+    """Open WARMUP_DB_CONNECTIONS pooled connections per engine (primary and replica), then return them."""
+    from sqlalchemy import text
+    from database import engine, replica_engine
+
+    engines = [engine] if replica_engine is None else [engine, replica_engine]
+    connections = []
+    try:
+        for target in engines:
+            for _ in range(WARMUP_DB_CONNECTIONS):
+                conn = target.connect()
+                connections.append(conn)
+                conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()
+    return {"connections": len(connections)}
+
+
+@warmup_step("bcrypt")
+def _warm_bcrypt():
+    """Load the bcrypt backend so the first login does not pay for it."""
+    from auth import pwd_context
+
+    pwd_context.dummy_verify()
+
+
+@warmup_step("external_clients")
+def _warm_clients():
+    from clients import init_clients
+
+    init_clients()
+
+
+@warmup_step("google_certs")
+def _warm_google_certs():
+    from clients import GOOGLE_CLIENT_ID, prefetch_google_certs
+
+    if not GOOGLE_CLIENT_ID:
+        return "skipped (GOOGLE_CLIENT_ID not set)"
+    prefetch_google_certs()